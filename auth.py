@@ -1,15 +1,23 @@
 """
 Authentication utilities for JWT token generation and password hashing
 """
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Optional, Union
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from dependencies import get_db
+from dependencies import get_db, get_async_db
 from models.User import User
+from db import queries
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
@@ -19,9 +27,33 @@ SECRET_KEY = "ulavan_planet_secret_key_change_in_production_2026"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# "db" loads the User row on every request, "claims" trusts the verified token
+# and only loads the row when a handler touches profile fields
+AUTH_MODE = os.getenv("AUTH_MODE", "db").lower()
+# How long a user's token_version is trusted before it is re-read from the DB
+TOKEN_VERSION_CACHE_TTL = float(os.getenv("TOKEN_VERSION_CACHE_TTL", "30"))
+TOKEN_VERSION_CACHE_SIZE = int(os.getenv("TOKEN_VERSION_CACHE_SIZE", "10000"))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password"""
+# Verified-token cache: decoded payloads keyed by token digest, kept until exp
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+# bcrypt work factor; existing hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt runs on its own small pool and login/signup await it, so a login burst
+# neither takes over the request threadpool nor parks request threads waiting on it
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+# Running + queued jobs; once exhausted new requests get a 503 instead of waiting
+_password_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
     try:
         return bcrypt.checkpw(
             plain_password.encode('utf-8'), 
@@ -31,13 +63,55 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    salt = bcrypt.gensalt()
+def _hashpw(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+async def _run_password_job(fn, *args):
+    """
+    Run a bcrypt job on the password pool, or fail fast with 503 when it is saturated.
+    The caller awaits the job, so queued logins hold no request thread while they wait.
+    """
+    busy_exception = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+    if not _password_slots.acquire(blocking=False):
+        raise busy_exception
+    try:
+        future = _password_executor.submit(fn, *args)
+    except Exception:
+        _password_slots.release()
+        raise
+    # The slot is held until the job really finishes, even if we stop waiting for it
+    future.add_done_callback(lambda _: _password_slots.release())
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=PASSWORD_HASH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise busy_exception
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plain password against a hashed password"""
+    return await _run_password_job(_checkpw, plain_password, hashed_password)
+
+
+async def get_password_hash(password: str) -> str:
+    """Hash a password"""
+    return await _run_password_job(_hashpw, password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a stored hash was made with a different bcrypt cost"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -47,12 +121,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
+    from jose import jwt  # deferred: python-jose loads its crypto backends on import
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and verify a JWT token"""
+# sha256(token) -> verified payload, least recently used first
+_token_cache: OrderedDict = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def _verify_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -60,31 +140,208 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode and verify a JWT token (verified payloads are cached until they expire)"""
+    if TOKEN_CACHE_SIZE <= 0:
+        return _verify_token(token)
+    
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+        if payload is not None:
+            if payload["exp"] > now:
+                _token_cache.move_to_end(key)
+                return dict(payload)
+            del _token_cache[key]
+    
+    payload = _verify_token(token)
+    if payload is None or not isinstance(payload.get("exp"), (int, float)):
+        return payload
+    
+    with _token_cache_lock:
+        _token_cache[key] = payload
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return dict(payload)
+
+
+def clear_token_cache() -> None:
+    """Empty the verified-token cache"""
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
+def create_user_token(user: User) -> str:
+    """Create an access token carrying the claims needed for claims-only auth"""
+    return create_access_token(data={
+        "user_id": user.id,
+        "role": user.role,
+        "token_version": user.token_version or 0,
+    })
+
+
+# user_id -> (token_version, cached_at)
+_token_versions: dict = {}
+_token_versions_lock = threading.Lock()
+
+
+def _cached_token_version(user_id: int, now: float) -> Optional[int]:
+    with _token_versions_lock:
+        cached = _token_versions.get(user_id)
+    if cached is not None and now - cached[1] < TOKEN_VERSION_CACHE_TTL:
+        return cached[0]
+    return None
+
+
+def _remember_token_version(user_id: int, version: Optional[int], now: float) -> Optional[int]:
+    if version is None:
+        forget_token_version(user_id)
+        return None
+
+    with _token_versions_lock:
+        if len(_token_versions) >= TOKEN_VERSION_CACHE_SIZE:
+            _token_versions.clear()
+        _token_versions[user_id] = (version, now)
+    return version
+
+
+def get_token_version(db: Session, user_id: int) -> Optional[int]:
+    """Return the user's current token_version, or None if the user is gone"""
+    now = time.monotonic()
+    version = _cached_token_version(user_id, now)
+    if version is not None:
+        return version
+    return _remember_token_version(user_id, db.execute(queries.user_token_version(user_id)).scalar(), now)
+
+
+async def get_token_version_async(db: AsyncSession, user_id: int) -> Optional[int]:
+    """get_token_version() on an AsyncSession"""
+    now = time.monotonic()
+    version = _cached_token_version(user_id, now)
+    if version is not None:
+        return version
+    return _remember_token_version(user_id, (await db.execute(queries.user_token_version(user_id))).scalar(), now)
+
+
+def forget_token_version(user_id: int) -> None:
+    """Drop a cached token_version so the next request re-reads it"""
+    with _token_versions_lock:
+        _token_versions.pop(user_id, None)
+
+
+def revoke_user_tokens(db: Session, user: User) -> None:
+    """Invalidate every token issued to the user so far"""
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    forget_token_version(user.id)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+class TokenUser:
+    """
+    Authenticated user resolved from verified token claims.
+    id and role come from the token; any other attribute loads the
+    full User row on first access.
+    """
+
+    def __init__(self, user_id: int, role: str, token_version: int, db: Optional[Session]):
+        self.id = user_id
+        self.role = role
+        self.token_version = token_version
+        self._db = db
+        self._user = None
+
+    def load(self) -> User:
+        """Load (once) and return the full User row"""
+        if self._db is None:
+            raise RuntimeError("TokenUser from get_current_principal_async cannot load the User row")
+        if self._user is None:
+            self._user = self._db.get(User, self.id)
+            if self._user is None:
+                raise _credentials_exception()
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+
+def _verified_claims(token: str) -> dict:
     payload = decode_access_token(token)
-    if payload is None:
-        raise credentials_exception
-    
-    user_id: int = payload.get("user_id")
-    if user_id is None:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
+    if payload is None or payload.get("user_id") is None:
+        raise _credentials_exception()
+    return payload
+
+
+def _check_user_token(payload: dict, user: Optional[User]) -> User:
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    if payload.get("token_version", 0) != (user.token_version or 0):
+        raise _credentials_exception()
     
     return user
 
 
-def get_current_seller(current_user: User = Depends(get_current_user)) -> User:
-    """Verify that the current user is a seller"""
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db, scope="function")) -> User:
+    """Get the current authenticated user from JWT token"""
+    payload = _verified_claims(token)
+    user = db.execute(queries.user_by_id(payload["user_id"])).scalar_one_or_none()
+    return _check_user_token(payload, user)
+
+
+def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db, scope="function")
+) -> Union[User, TokenUser]:
+    """
+    Get the current user for role-gated routes.
+    In claims mode the role and token version are checked without loading the User row.
+    """
+    if AUTH_MODE != "claims":
+        return get_current_user(token, db)
+    
+    payload = _verified_claims(token)
+    user_id = payload["user_id"]
+    token_version = payload.get("token_version", 0)
+    
+    if get_token_version(db, user_id) != token_version:
+        raise _credentials_exception()
+    
+    return TokenUser(user_id, payload.get("role"), token_version, db)
+
+
+async def get_current_principal_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db, scope="function")
+) -> Union[User, TokenUser]:
+    """
+    get_current_principal() for async routes: the user or token version is read
+    through the async session, so auth takes no request thread or sync pool connection.
+    In claims mode the TokenUser only carries id and role (it cannot load the User row).
+    """
+    payload = _verified_claims(token)
+    user_id = payload["user_id"]
+    
+    if AUTH_MODE != "claims":
+        user = (await db.execute(queries.user_by_id(user_id))).scalar_one_or_none()
+        return _check_user_token(payload, user)
+    
+    token_version = payload.get("token_version", 0)
+    if await get_token_version_async(db, user_id) != token_version:
+        raise _credentials_exception()
+    
+    return TokenUser(user_id, payload.get("role"), token_version, None)
+
+
+def _require_seller(current_user: User) -> User:
     if current_user.role != "seller":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -93,11 +350,25 @@ def get_current_seller(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def get_current_buyer(current_user: User = Depends(get_current_user)) -> User:
-    """Verify that the current user is a buyer"""
+def _require_buyer(current_user: User) -> User:
     if current_user.role not in ["buyer", "customer"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only buyers can access this resource"
         )
     return current_user
+
+
+def get_current_seller(current_user: User = Depends(get_current_principal)) -> User:
+    """Verify that the current user is a seller"""
+    return _require_seller(current_user)
+
+
+def get_current_buyer(current_user: User = Depends(get_current_principal)) -> User:
+    """Verify that the current user is a buyer"""
+    return _require_buyer(current_user)
+
+
+async def get_current_buyer_async(current_user: User = Depends(get_current_principal_async)) -> User:
+    """get_current_buyer() for async routes"""
+    return _require_buyer(current_user)
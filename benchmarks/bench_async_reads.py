@@ -0,0 +1,108 @@
+"""
+Benchmark: concurrent-request throughput of the sync vs async product listing path.
+
+Both handlers are mounted side by side on one app and driven in-process with
+httpx (no network hop). Point --database-url at Postgres to see the effect of
+real round-trip latency; the default is a throwaway SQLite file.
+
+httpx is not an app dependency; install it with
+    pip install -r benchmarks/requirements.txt
+
+Run from the project root:
+    python -m benchmarks.bench_async_reads [--database-url URL] [--requests 2000] [--concurrency 100]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--products", type=int, default=200, help="rows to seed (SQLite only)")
+    return parser.parse_args()
+
+
+args = parse_args()
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from db import migrations  # noqa: E402
+from db.session import SessionLocal, get_engine, get_async_engine  # noqa: E402
+from models import User, Product, Category  # noqa: E402
+from routers import product_routes  # noqa: E402
+
+
+def seed(count):
+    migrations.upgrade(get_engine(), log=lambda message: None)
+    db = SessionLocal()
+    try:
+        if db.query(Product).count():
+            return
+        seller = User(username="bench_seller", email="bench@example.com", password="x",
+                      phone="0", address="-", role="seller")
+        category = Category(name="Bench")
+        db.add_all([seller, category])
+        db.flush()
+        db.add_all([
+            Product(seller_id=seller.id, category_id=category.category_id, name=f"Product {i}",
+                    description="benchmark product", price=10 + i % 50, stock_quantity=100)
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_app():
+    app = FastAPI()
+    app.get("/sync/products")(product_routes.get_all_products)
+    app.get("/async/products")(product_routes.get_all_products_async)
+    return app
+
+
+async def drive(client, path, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            response = await client.get(path)
+            if response.status_code != 200:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start, failures
+
+
+async def main():
+    if not args.database_url:
+        seed(args.products)
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up both pools and the compiled-statement caches
+        await drive(client, "/sync/products", 50, 10)
+        await drive(client, "/async/products", 50, 10)
+
+        print(f"database={get_engine().url.render_as_string(hide_password=True)}")
+        print(f"requests={args.requests} concurrency={args.concurrency}")
+        for label, path in (("sync", "/sync/products"), ("async", "/async/products")):
+            elapsed, failures = await drive(client, path, args.requests, args.concurrency)
+            print(f"{label:5}: {args.requests / elapsed:8.1f} req/s  "
+                  f"({elapsed * 1000 / args.requests:6.2f} ms/req avg, {failures} failed)")
+    await get_async_engine().dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: per-call Python overhead of the hot lookups, comparing
+  - legacy   db.query(...).filter(...).first()  (rebuilt on every call)
+  - select   a select() constructed per call     (compiled SQL cached, cache key regenerated)
+  - lambda   the db.queries lambda statements    (construct and cache key reused)
+
+Runs against a throwaway SQLite file so the database cost is small and the
+difference is mostly SQLAlchemy's own work.
+
+Run from the project root:
+    python -m benchmarks.bench_compiled_statements [--calls 20000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from sqlalchemy import select  # noqa: E402
+from db import migrations, queries  # noqa: E402
+from db.session import SessionLocal, get_engine  # noqa: E402
+from models import User, Product, Cart  # noqa: E402
+
+
+def seed(db):
+    user = User(username="bench", email="bench@example.com", password="x",
+                phone="0", address="-", role="buyer")
+    db.add(user)
+    db.flush()
+    products = [Product(seller_id=user.id, name=f"p{i}", price=10, stock_quantity=5) for i in range(5)]
+    db.add_all(products)
+    db.flush()
+    db.add_all([Cart(user_id=user.id, product_id=p.id, quantity=1) for p in products])
+    db.commit()
+    return user.id, products[0].id
+
+
+def timed(fn, calls):
+    for _ in range(200):  # warm the caches
+        fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    migrations.upgrade(get_engine(), log=lambda message: None)
+    db = SessionLocal()
+    user_id, product_id = seed(db)
+
+    cases = {
+        "user by id": {
+            "legacy": lambda: db.query(User).filter(User.id == user_id).first(),
+            "select": lambda: db.execute(select(User).where(User.id == user_id)).scalar_one_or_none(),
+            "lambda": lambda: db.execute(queries.user_by_id(user_id)).scalar_one_or_none(),
+        },
+        "product by id": {
+            "legacy": lambda: db.query(Product).filter(Product.id == product_id).first(),
+            "select": lambda: db.execute(select(Product).where(Product.id == product_id)).scalar_one_or_none(),
+            "lambda": lambda: db.execute(queries.product_by_id(product_id)).scalar_one_or_none(),
+        },
+        "cart by user": {
+            "legacy": lambda: db.query(Cart, Product).join(Product, Product.id == Cart.product_id)
+                                .filter(Cart.user_id == user_id).order_by(Cart.cart_id).all(),
+            "select": lambda: db.execute(
+                select(Cart, Product).join(Product, Product.id == Cart.product_id)
+                .where(Cart.user_id == user_id).order_by(Cart.cart_id)
+            ).all(),
+            "lambda": lambda: db.execute(queries.cart_with_products(user_id)).all(),
+        },
+    }
+
+    print(f"calls={args.calls} (microseconds per call)")
+    print(f"{'query':16} {'legacy':>9} {'select':>9} {'lambda':>9} {'saved':>9}")
+    for name, variants in cases.items():
+        results = {label: timed(fn, args.calls) for label, fn in variants.items()}
+        saved = results["legacy"] - results["lambda"]
+        print(f"{name:16} {results['legacy']:9.1f} {results['select']:9.1f} "
+              f"{results['lambda']:9.1f} {saved:9.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Micro-benchmark: per-request JWT decode cost with and without the verified-token cache.
+
+Run from the project root:
+    python -m benchmarks.bench_token_cache [--users 200] [--requests 50000]
+"""
+import argparse
+import os
+import random
+import time
+
+# auth imports the DB layer; no database is touched here
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import auth  # noqa: E402
+
+
+def run(decode, tokens, requests):
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for _ in range(requests):
+        decode(rng.choice(tokens))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200, help="distinct active tokens")
+    parser.add_argument("--requests", type=int, default=50000, help="decode calls per run")
+    args = parser.parse_args()
+
+    tokens = [
+        auth.create_access_token({"user_id": i, "role": "buyer", "token_version": 0})
+        for i in range(args.users)
+    ]
+
+    uncached = run(auth._verify_token, tokens, args.requests)
+    auth.clear_token_cache()
+    cached = run(auth.decode_access_token, tokens, args.requests)
+
+    per_uncached = uncached / args.requests * 1e6
+    per_cached = cached / args.requests * 1e6
+    print(f"tokens={args.users} requests={args.requests} cache_size={auth.TOKEN_CACHE_SIZE}")
+    print(f"without cache: {per_uncached:8.2f} us/request")
+    print(f"with cache:    {per_cached:8.2f} us/request")
+    print(f"speedup:       {per_uncached / per_cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
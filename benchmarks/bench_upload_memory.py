@@ -0,0 +1,93 @@
+"""
+Memory benchmark: peak Python heap per upload, reading the file whole vs streaming it.
+
+Each file is prepared the way multipart parsing leaves it (a SpooledTemporaryFile
+that rolled over to disk) and then uploaded through utils.cloudinary_utils:
+  - buffered   content = await file.read(); upload_image(content)   (previous routes)
+  - streamed   upload_image(file.file)                              (current routes)
+
+The Cloudinary SDK is replaced by an uploader that consumes its input the way
+the SDK does (upload() reads a stream whole, upload_large() reads one chunk at a
+time) without network calls, so the numbers show what our side keeps in memory.
+
+Run from the project root:
+    python -m benchmarks.bench_upload_memory [--sizes 2,8,32]
+"""
+import argparse
+import asyncio
+import os
+import tracemalloc
+from tempfile import SpooledTemporaryFile
+
+from fastapi import UploadFile
+
+from utils import cloudinary_utils
+
+
+class ReadingUploader:
+    """Reads its input like the SDK would, returns a fake URL"""
+
+    @staticmethod
+    def upload(file, **options):
+        data = file.read() if hasattr(file, "read") else file
+        return {"secure_url": f"https://example.invalid/{len(data)}"}
+
+    @staticmethod
+    def upload_large(file, chunk_size, **options):
+        total = 0
+        with file:
+            chunk = file.read(chunk_size)
+            while chunk:
+                total += len(chunk)
+                chunk = file.read(chunk_size)
+        return {"secure_url": f"https://example.invalid/{total}"}
+
+
+def spooled_upload(size: int) -> UploadFile:
+    spool = SpooledTemporaryFile(max_size=1024 * 1024)
+    block = os.urandom(1024 * 1024)
+    for _ in range(size // len(block)):
+        spool.write(block)
+    spool.seek(0)
+    return UploadFile(spool, size=size, filename="photo.jpg")
+
+
+async def buffered(file: UploadFile):
+    content = await file.read()
+    return cloudinary_utils.upload_image(content)
+
+
+async def streamed(file: UploadFile):
+    await file.seek(0)
+    return cloudinary_utils.upload_image(file.file)
+
+
+def peak_mb(handler, size: int) -> float:
+    file = spooled_upload(size)
+    tracemalloc.start()
+    try:
+        asyncio.run(handler(file))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        file.file.close()
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="2,8,32", help="file sizes in MB")
+    args = parser.parse_args()
+
+    cloudinary_utils.get_uploader = lambda: ReadingUploader
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(f"chunk size {cloudinary_utils.UPLOAD_CHUNK_SIZE / (1024 * 1024):g}MB (peak Python heap, MB)")
+    print(f"{'file':>8} {'buffered':>10} {'streamed':>10}")
+    for size in sizes:
+        size_bytes = size * 1024 * 1024
+        print(f"{size:>6}MB {peak_mb(buffered, size_bytes):10.1f} {peak_mb(streamed, size_bytes):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
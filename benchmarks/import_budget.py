@@ -0,0 +1,71 @@
+"""
+Import-time budget report for the application entry point.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and
+reports the cost of each module, aggregated by top-level package. With
+--budget-ms the exit status is 1 when the total exceeds the budget, so it can
+guard cold-start regressions in CI.
+
+Run from the project root:
+    python -m benchmarks.import_budget [--top 20] [--budget-ms 1500] [--module main]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+
+def measure(module):
+    env = dict(os.environ)
+    # Importing must not need a reachable database
+    env.setdefault("DATABASE_URL", "sqlite://")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    # Lines look like: "import time:   self_us |   cumulative_us | <indent>package.module"
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us), name))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cum for name, _, cum, _ in reversed(rows) if name == args.module) / 1000
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"Total import time for '{args.module}': {total_ms:.1f} ms ({len(rows)} modules)\n")
+    print(f"{'package':30} {'self ms':>10}")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:30} {us / 1000:10.1f}")
+
+    print(f"\n{'module':50} {'self ms':>10} {'cumulative ms':>14}")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"{name:50} {self_us / 1000:10.1f} {cumulative_us / 1000:14.1f}")
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nOVER BUDGET: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+SQL instrumentation: per-request query count and DB time, plus a slow-query log.
+
+Engine events (registered for every Engine, so the primary, replicas and the
+async engine are all covered) add to the stats of the request that issued the
+query. The stats live in a ContextVar set by the HTTP middleware in main.py;
+the threadpool that runs sync handlers and dependencies copies the context,
+so they share the same stats object.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DB_INSTRUMENTATION = os.getenv("DB_INSTRUMENTATION", "true").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+logger = logging.getLogger("db.slow_query")
+
+
+class RequestQueryStats:
+    """SQL statements executed while serving one request"""
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        """Route template (e.g. /products/{product_id}) once routing has happened"""
+        if not self.scope:
+            return "-"
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "-")
+        return f"{self.scope.get('method', '')} {path}".strip()
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", '
+            f"app;dur={total_seconds * 1000:.1f}"
+        )
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request(scope: dict):
+    """Begin collecting stats for a request; returns the reset token"""
+    return _current.set(RequestQueryStats(scope))
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMS = re.compile(r"%\(\w+\)s|(?<!:):\w+|\$\d+")
+_PARAM_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape with literals and bind parameters normalised, e.g. `... WHERE id = ?`"""
+    shape = _LITERALS.sub("?", statement)
+    shape = _PARAMS.sub("?", shape)
+    shape = _PARAM_LISTS.sub("(?+)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def fingerprint_id(shape: str) -> str:
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if DB_INSTRUMENTATION:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        shape = fingerprint(statement)
+        logger.warning(
+            "slow query %.1f ms fingerprint=%s route=%s statement=%s",
+            elapsed * 1000,
+            fingerprint_id(shape),
+            stats.route if stats is not None else "-",
+            shape,
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
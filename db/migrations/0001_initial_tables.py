@@ -0,0 +1,97 @@
+"""Create the application tables (a no-op on databases that already have them)"""
+from datetime import datetime
+from sqlalchemy import (
+    CheckConstraint, Column, DateTime, ForeignKey, Integer, MetaData, Numeric, String, Table, Text
+)
+
+VERSION = 1
+DESCRIPTION = "initial tables"
+
+
+def upgrade(conn):
+    # The schema as it was before versioned migrations; later columns and tables come from 0002 on
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("username", String, unique=True, nullable=False),
+        Column("email", String, unique=True, nullable=False),
+        Column("password", String, nullable=False),
+        Column("phone", String(20), nullable=False),
+        Column("address", Text, nullable=False),
+        Column("role", String(50), default="customer"),
+        Column("created_at", DateTime, default=datetime.utcnow),
+    )
+    Table(
+        "categories", metadata,
+        Column("category_id", Integer, primary_key=True, index=True),
+        Column("name", String(100), nullable=False),
+        Column("description", Text),
+    )
+    Table(
+        "products", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("seller_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        Column("category_id", Integer, ForeignKey("categories.category_id", ondelete="SET NULL")),
+        Column("name", String(200), nullable=False),
+        Column("description", Text),
+        Column("price", Numeric(10, 2), nullable=False),
+        Column("stock_quantity", Integer, default=0),
+        Column("image_url", Text),
+        Column("created_at", DateTime, default=datetime.utcnow),
+    )
+    Table(
+        "cart", metadata,
+        Column("cart_id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+        Column("product_id", Integer, ForeignKey("products.id", ondelete="CASCADE")),
+        Column("quantity", Integer, default=1),
+    )
+    Table(
+        "orders", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+        Column("order_date", DateTime, default=datetime.utcnow),
+        Column("total_amount", Numeric(10, 2), nullable=False),
+        Column("status", String(50), default="pending"),
+    )
+    Table(
+        "order_items", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("order_id", Integer, ForeignKey("orders.id", ondelete="CASCADE")),
+        Column("product_id", Integer, ForeignKey("products.id", ondelete="CASCADE")),
+        Column("quantity", Integer, nullable=False),
+        Column("price", Numeric(10, 2), nullable=False),
+    )
+    Table(
+        "reviews", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("product_id", Integer, ForeignKey("products.id", ondelete="CASCADE")),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+        Column("rating", Integer, nullable=False),
+        Column("comment", Text),
+        Column("created_at", DateTime, default=datetime.utcnow),
+        CheckConstraint("rating >= 1 AND rating <= 5", name="rating_range"),
+    )
+    Table(
+        "reports", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+        Column("order_id", String(50), nullable=True),
+        Column("issue_type", String(50), nullable=False),
+        Column("subject", String(200), nullable=False),
+        Column("description", Text, nullable=False),
+        Column("status", String(20), default="open"),
+        Column("created_at", DateTime, default=datetime.utcnow),
+    )
+    Table(
+        "feedbacks", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE")),
+        Column("username", String(100)),
+        Column("email", String(100)),
+        Column("rating", Integer),
+        Column("comments", Text),
+        Column("created_at", DateTime, default=datetime.utcnow),
+    )
+    metadata.create_all(bind=conn, checkfirst=True)
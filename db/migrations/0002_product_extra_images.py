@@ -0,0 +1,10 @@
+"""Second and third product images (previously added by the startup hook)"""
+from db.migrations import add_column
+
+VERSION = 2
+DESCRIPTION = "products.image_url_2 / image_url_3"
+
+
+def upgrade(conn):
+    add_column(conn, "products", "image_url_2", "TEXT")
+    add_column(conn, "products", "image_url_3", "TEXT")
@@ -0,0 +1,9 @@
+"""Per-user token version used to revoke issued JWTs"""
+from db.migrations import add_column
+
+VERSION = 3
+DESCRIPTION = "users.token_version"
+
+
+def upgrade(conn):
+    add_column(conn, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
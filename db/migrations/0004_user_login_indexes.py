@@ -0,0 +1,11 @@
+"""Case-insensitive unique indexes backing the login lookup"""
+from db.migrations import create_index
+
+VERSION = 4
+DESCRIPTION = "unique lower(username) / lower(email) indexes"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(conn, "ix_users_username_lower", "users", "lower(username)", unique=True)
+    create_index(conn, "ix_users_email_lower", "users", "lower(email)", unique=True)
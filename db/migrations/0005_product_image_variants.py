@@ -0,0 +1,10 @@
+"""Card and thumbnail variants of the main product image"""
+from db.migrations import add_column
+
+VERSION = 5
+DESCRIPTION = "products.card_image_url / thumbnail_url"
+
+
+def upgrade(conn):
+    add_column(conn, "products", "card_image_url", "TEXT")
+    add_column(conn, "products", "thumbnail_url", "TEXT")
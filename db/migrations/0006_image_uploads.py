@@ -0,0 +1,20 @@
+"""Content-hash index of uploaded images"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from db.migrations import create_table
+
+VERSION = 6
+DESCRIPTION = "image_uploads (sha256 -> url)"
+
+
+def upgrade(conn):
+    create_table(
+        conn, "image_uploads",
+        Column("content_hash", String(64), primary_key=True),
+        Column("url", Text, nullable=False),
+        Column("card_url", Text, nullable=True),
+        Column("thumbnail_url", Text, nullable=True),
+        Column("size_bytes", Integer),
+        Column("uploaded_by", Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        Column("created_at", DateTime),
+        references=["users.id"],
+    )
@@ -0,0 +1,20 @@
+"""Background upload jobs"""
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String
+from db.migrations import create_table
+
+VERSION = 7
+DESCRIPTION = "upload_jobs"
+
+
+def upgrade(conn):
+    create_table(
+        conn, "upload_jobs",
+        Column("id", String(32), primary_key=True),
+        Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True),
+        Column("status", String(20), nullable=False),
+        Column("file_count", Integer, nullable=False),
+        Column("result", JSON, nullable=True),
+        Column("created_at", DateTime),
+        Column("finished_at", DateTime, nullable=True),
+        references=["users.id"],
+    )
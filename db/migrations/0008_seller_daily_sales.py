@@ -0,0 +1,31 @@
+"""Daily sales rollup behind the seller analytics endpoints, backfilled from existing orders"""
+from sqlalchemy import Column, Date, ForeignKey, Integer, Numeric, text
+from db.migrations import create_table
+
+VERSION = 8
+DESCRIPTION = "seller_daily_sales rollup"
+
+
+def upgrade(conn):
+    create_table(
+        conn, "seller_daily_sales",
+        Column("seller_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        Column("day", Date, primary_key=True),
+        Column("product_id", Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True),
+        Column("units", Integer, nullable=False),
+        Column("revenue", Numeric(12, 2), nullable=False),
+        Column("order_count", Integer, nullable=False),
+        references=["users.id", "products.id"],
+    )
+    # Backfill; the same query as utils.sales_rollup.rebuild() at the time of this migration
+    conn.execute(text("DELETE FROM seller_daily_sales"))
+    conn.execute(text(
+        "INSERT INTO seller_daily_sales (seller_id, day, product_id, units, revenue, order_count)"
+        " SELECT p.seller_id, date(o.order_date), oi.product_id,"
+        " SUM(oi.quantity), SUM(oi.price * oi.quantity), COUNT(DISTINCT oi.order_id)"
+        " FROM order_items oi"
+        " JOIN products p ON p.id = oi.product_id"
+        " JOIN orders o ON o.id = oi.order_id"
+        " WHERE (o.status IS NULL OR o.status <> 'cancelled') AND p.seller_id IS NOT NULL"
+        " GROUP BY p.seller_id, date(o.order_date), oi.product_id"
+    ))
@@ -0,0 +1,31 @@
+"""Per-product reorder thresholds, the low-stock partial index and the inventory alert queue"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from db.migrations import add_column, create_index, create_table
+
+VERSION = 9
+DESCRIPTION = "products.reorder_threshold, ix_products_low_stock, inventory_alerts"
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    add_column(conn, "products", "reorder_threshold", "INTEGER NOT NULL DEFAULT 0")
+    create_index(
+        conn, "ix_products_low_stock", "products", "seller_id, stock_quantity",
+        where="stock_quantity <= reorder_threshold"
+    )
+    create_table(
+        conn, "inventory_alerts",
+        Column("id", Integer, primary_key=True),
+        Column("seller_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        Column("product_id", Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False),
+        Column("kind", String(20), nullable=False),
+        Column("stock_quantity", Integer, nullable=False),
+        Column("reorder_threshold", Integer, nullable=False),
+        Column("created_at", DateTime),
+        Column("seen_at", DateTime, nullable=True),
+        references=["users.id", "products.id"],
+    )
+    create_index(
+        conn, "ix_inventory_alerts_unseen", "inventory_alerts", "seller_id, id",
+        where="seen_at IS NULL"
+    )
@@ -0,0 +1,171 @@
+"""
+Versioned schema migrations.
+
+Each migration is a module in this package named NNNN_description.py with:
+    VERSION        int, strictly increasing
+    DESCRIPTION    one line for `python migrate.py history`
+    TRANSACTIONAL  optional, default True; False runs upgrade() in autocommit
+                   mode (needed for CREATE INDEX CONCURRENTLY on Postgres)
+    upgrade(conn)  applies the change
+
+Applied versions are recorded in the schema_migrations table. Migrations must
+be idempotent: databases created by the old create_all/ALTER-at-startup code
+already have some of these changes and simply get stamped.
+
+Migrations spell out their DDL (add_column, create_index, create_table with
+explicit Columns) instead of using the model classes, so a later model edit
+never changes what an old migration does.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import MetaData, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+# Serialises concurrent `migrate upgrade` runs on Postgres
+_ADVISORY_LOCK_ID = 72_010_034
+
+
+def load_migrations() -> list:
+    """All migration modules, ordered by VERSION"""
+    modules = [
+        importlib.import_module(f"{__name__}.{info.name}")
+        for info in pkgutil.iter_modules(__path__)
+        if info.name[:4].isdigit()
+    ]
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return modules
+
+
+def latest_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1].VERSION if migrations else 0
+
+
+def _ensure_migrations_table(conn: Connection) -> None:
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        " version INTEGER PRIMARY KEY,"
+        " description VARCHAR(200) NOT NULL,"
+        " applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_versions(conn: Connection) -> List[int]:
+    if not inspect(conn).has_table(MIGRATIONS_TABLE):
+        return []
+    rows = conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE} ORDER BY version"))
+    return [row.version for row in rows]
+
+
+def current_version(engine: Engine) -> int:
+    """Highest applied version; a single cheap query, used by app startup"""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(MIGRATIONS_TABLE):
+            return 0
+        return conn.execute(text(f"SELECT MAX(version) FROM {MIGRATIONS_TABLE}")).scalar() or 0
+
+
+def _record(conn: Connection, migration) -> None:
+    conn.execute(
+        text(f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (:v, :d, :t)"),
+        {"v": migration.VERSION, "d": migration.DESCRIPTION, "t": datetime.utcnow()},
+    )
+
+
+def _apply(engine: Engine, migration) -> None:
+    if getattr(migration, "TRANSACTIONAL", True):
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            _record(conn, migration)
+        return
+    with engine.connect() as conn:
+        migration.upgrade(conn.execution_options(isolation_level="AUTOCOMMIT"))
+    with engine.begin() as conn:
+        _record(conn, migration)
+
+
+def upgrade(engine: Engine, target: Optional[int] = None, log=print) -> List[int]:
+    """Apply pending migrations up to target (default: latest); returns the versions applied"""
+    is_postgres = engine.dialect.name == "postgresql"
+    applied = []
+    with engine.connect() as lock_conn:
+        if is_postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            lock_conn.commit()
+        try:
+            with engine.begin() as conn:
+                _ensure_migrations_table(conn)
+                done = set(applied_versions(conn))
+            for migration in load_migrations():
+                if migration.VERSION in done:
+                    continue
+                if target is not None and migration.VERSION > target:
+                    break
+                log(f"Applying {migration.VERSION:04d}: {migration.DESCRIPTION}")
+                _apply(engine, migration)
+                applied.append(migration.VERSION)
+        finally:
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+                lock_conn.commit()
+    return applied
+
+
+# Helpers for writing idempotent migrations
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def create_index(
+    conn: Connection,
+    name: str,
+    table: str,
+    expression: str,
+    unique: bool = False,
+    where: Optional[str] = None
+) -> None:
+    """
+    CREATE INDEX IF NOT EXISTS; uses CONCURRENTLY on Postgres when the
+    connection is in autocommit mode, so writes to the table are not blocked.
+    """
+    concurrently = (
+        conn.dialect.name == "postgresql"
+        and conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+    )
+    conn.execute(text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX {'CONCURRENTLY ' if concurrently else ''}"
+        f"IF NOT EXISTS {name} ON {table} ({expression})"
+        f"{f' WHERE {where}' if where else ''}"
+    ))
+
+
+def create_table(conn: Connection, name: str, *columns, references=()) -> Table:
+    """
+    CREATE TABLE unless it already exists, from the columns and constraints
+    given in the migration. Foreign keys need their targets declared:
+    references=["users.id"] adds a placeholder users table holding only that
+    column (it is not created, only used to resolve the foreign key).
+    """
+    from sqlalchemy import Column, Integer
+
+    metadata = MetaData()
+    for reference in references:
+        table_name, column_name = reference.split(".")
+        Table(table_name, metadata, Column(column_name, Integer, primary_key=True))
+    table = Table(name, metadata, *columns)
+    table.create(bind=conn, checkfirst=True)
+    return table
@@ -0,0 +1,80 @@
+"""
+Prebuilt statements for the hottest lookups.
+
+These use lambda_stmt: SQLAlchemy caches the constructed select (and its
+compiled SQL) by the lambda's code location, so each call only extracts the
+closure values as bound parameters instead of rebuilding the query and
+generating a fresh cache key.
+"""
+from sqlalchemy import case, distinct, func, lambda_stmt, select
+from models.User import User
+from models.Product import Product
+from models.Category import Category
+from models.Cart import Cart
+from models.Order import Order
+from models.OrderItem import OrderItem
+
+
+def user_by_id(user_id: int):
+    return lambda_stmt(lambda: select(User).where(User.id == user_id))
+
+
+def user_token_version(user_id: int):
+    return lambda_stmt(lambda: select(User.token_version).where(User.id == user_id))
+
+
+def product_by_id(product_id: int):
+    return lambda_stmt(lambda: select(Product).where(Product.id == product_id))
+
+
+def product_with_seller_by_id(product_id: int):
+    """Product plus its seller's username and category name"""
+    return lambda_stmt(
+        lambda: select(Product, User.username, Category.name)
+        .outerjoin(User, User.id == Product.seller_id)
+        .outerjoin(Category, Category.category_id == Product.category_id)
+        .where(Product.id == product_id)
+    )
+
+
+def cart_with_products(user_id: int):
+    """Cart items with their products (items whose product is gone are skipped)"""
+    return lambda_stmt(
+        lambda: select(Cart, Product)
+        .join(Product, Product.id == Cart.product_id)
+        .where(Cart.user_id == user_id)
+        .order_by(Cart.cart_id)
+    )
+
+
+def seller_dashboard_stats(seller_id: int):
+    """
+    Product count, order count, revenue and pending-order count for a seller in
+    one statement: the order figures are conditional aggregates over the
+    seller's order items, the product count a scalar subquery.
+    """
+    return lambda_stmt(
+        lambda: select(
+            select(func.count(Product.id))
+            .where(Product.seller_id == seller_id)
+            .scalar_subquery()
+            .label("total_products"),
+            func.count(distinct(OrderItem.order_id)).label("total_orders"),
+            func.sum(OrderItem.price * OrderItem.quantity).label("total_revenue"),
+            func.count(distinct(case((Order.status == "pending", OrderItem.order_id)))).label("pending_orders"),
+        )
+        .select_from(OrderItem)
+        .join(Product, Product.id == OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(Product.seller_id == seller_id)
+    )
+
+
+def order_seller_ids(order_id: int):
+    """Distinct sellers whose products are in an order"""
+    return lambda_stmt(
+        lambda: select(distinct(Product.seller_id))
+        .select_from(OrderItem)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id == order_id)
+    )
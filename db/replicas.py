@@ -0,0 +1,158 @@
+"""
+Read-replica routing.
+
+DATABASE_REPLICA_URLS is a comma-separated list of read-only databases. Read
+sessions are bound to them round-robin, skipping replicas that failed their
+last health check; with no healthy replica (or none configured) reads go to
+the primary. Clients that wrote recently are pinned to the primary for
+DB_READ_YOUR_WRITES_SECONDS so they see their own changes despite replica lag.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from db.session import SessionLocal, get_engine, _engine_options
+
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+DB_REPLICA_HEALTH_INTERVAL = float(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "5"))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+# Request header that forces reads onto the primary
+READ_PRIMARY_HEADER = "x-read-primary"
+
+
+class Replica:
+    """A replica engine plus its health state"""
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, **_engine_options(url))
+        self.healthy = True
+        self.checked_at = float("-inf")  # checked on first use
+        self._check_lock = threading.Lock()
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            self.healthy = False
+            self.checked_at = time.monotonic()
+
+    def available(self) -> bool:
+        """Whether reads may go here; re-checks with SELECT 1 once the last check is stale"""
+        if time.monotonic() - self.checked_at < DB_REPLICA_HEALTH_INTERVAL:
+            return self.healthy
+        # One request re-checks; the others use the last known state meanwhile
+        if not self._check_lock.acquire(blocking=False):
+            return self.healthy
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self.healthy = True
+        except Exception as e:
+            logger.warning(
+                "Replica health check failed for %s: %s", self.engine.url.render_as_string(hide_password=True), e
+            )
+            self.healthy = False
+        finally:
+            self.checked_at = time.monotonic()
+            self._check_lock.release()
+        return self.healthy
+
+    def stats(self) -> dict:
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "status": self.engine.pool.status(),
+        }
+
+
+class ReplicaSet:
+    """Round-robin over healthy replicas"""
+
+    def __init__(self, urls):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def pick(self):
+        """Return the next healthy replica engine, or None if there is none"""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[self._next % len(self.replicas)]
+                self._next += 1
+            if replica.available():
+                return replica.engine
+        return None
+
+
+class RecentWrites:
+    """Clients that made a successful mutation in the last few seconds (per worker)"""
+
+    def __init__(self, ttl: float, max_keys: int = 100000):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._until: dict = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.max_keys:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+            self._until[key] = now + self.ttl
+
+    def is_recent(self, key: str) -> bool:
+        with self._lock:
+            until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+
+_replica_set = None
+_replica_set_lock = threading.Lock()
+
+
+def get_replica_set() -> ReplicaSet:
+    """Replica engines are created on first use, like the primary"""
+    global _replica_set
+    if _replica_set is None:
+        with _replica_set_lock:
+            if _replica_set is None:
+                _replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
+    return _replica_set
+
+
+recent_writes = RecentWrites(DB_READ_YOUR_WRITES_SECONDS)
+
+
+def client_key(request) -> str:
+    """Identify the caller by bearer token, falling back to client IP"""
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def record_write(request) -> None:
+    """Pin the caller's reads to the primary for a short while after a mutation"""
+    if DATABASE_REPLICA_URLS:
+        recent_writes.mark(client_key(request))
+
+
+def open_read_session(request):
+    """Session for a read-only route: a healthy replica unless the caller needs the primary"""
+    if not DATABASE_REPLICA_URLS:
+        return SessionLocal()
+    if request.headers.get(READ_PRIMARY_HEADER) or recent_writes.is_recent(client_key(request)):
+        return SessionLocal(bind=get_engine())
+    replica_engine = get_replica_set().pick()
+    return SessionLocal(bind=replica_engine or get_engine())
+
+
+def get_replica_stats() -> list:
+    if not DATABASE_REPLICA_URLS:
+        return []
+    return [replica.stats() for replica in get_replica_set().replicas]
@@ -1,14 +1,208 @@
 from dotenv import load_dotenv
 import os
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker,declarative_base
+from sqlalchemy.pool import QueuePool
 load_dotenv()
 
-engine = create_engine(os.getenv("DATABASE_URL"))
+DATABASE_URL = os.getenv("DATABASE_URL")
 
-SessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
+# Connection pool settings (per uvicorn worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Serve the hot read routes (product listing/detail, cart, my-orders) from an AsyncSession
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def _engine_options(url, poolclass=TimedQueuePool) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    parsed = make_url(url)
+    # In-memory SQLite keeps one connection per thread; pool sizing does not apply
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    if poolclass is not None:
+        options["poolclass"] = poolclass
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def _async_database_url(url):
+    """Map DATABASE_URL onto its async driver: asyncpg for Postgres, aiosqlite for SQLite"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        # psycopg2's sslmode is spelled ssl for asyncpg
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return parsed.set(drivername="postgresql+asyncpg", query=query)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite")
+    return parsed
+
+
+# The engine (and its DBAPI driver) is created on first use rather than at import
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+    return _engine
+
+
+def __getattr__(name):
+    # Keeps `from db.session import engine` working while deferring engine creation
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to the primary engine the first time a session is made"""
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = LazySessionmaker(autocommit=False,autoflush=False)
 Base = declarative_base()
 
 
-# Database initialization and connection pool configuration
+class LazySession:
+    """
+    Request session that is only created when the handler first touches it.
+
+    Routes that fail before reaching the database (404 on a cached lookup,
+    validation, auth errors) never build a Session, and the Session itself
+    only checks a connection out of the pool on its first query.
+    """
+
+    def __init__(self, factory=None):
+        self._factory = factory or SessionLocal
+        self._session = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def _get(self):
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __contains__(self, instance):
+        return instance in self._get()
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_database_url(DATABASE_URL)
+
+# Created on first use so the async driver is only required when DB_ASYNC is on
+_async_engine = None
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, poolclass=None)
+        )
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmaker
+
 
+def get_pool_stats() -> dict:
+    """Live connection pool statistics for this worker process"""
+    pool = get_engine().pool
+    stats = {
+        "pid": os.getpid(),
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            pool_size=pool.size(),
+            max_overflow=DB_MAX_OVERFLOW,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            timeout=pool.timeout(),
+        )
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            stats.update(
+                checkouts=checkouts,
+                checkout_timeouts=pool.timeouts,
+                wait_total_ms=round(pool.wait_total * 1000, 3),
+                wait_avg_ms=round(pool.wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                wait_max_ms=round(pool.wait_max * 1000, 3),
+            )
+    return stats
@@ -1,7 +1,117 @@
-from db.session import SessionLocal
+import logging
+import os
+import threading
+from fastapi import Request
+from db.session import LazySession, SessionLocal, get_async_sessionmaker
+from db.replicas import open_read_session
+from db import instrumentation
+
+# Over-budget endpoints are logged as errors (test harness) instead of warnings (production).
+# Either way the response is not touched: the check runs after the handler may have committed.
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+budget_logger = logging.getLogger("db.query_budget")
+
+
+# The session dependencies are declared with scope="function":
+#
+#     db: Session = Depends(get_db, scope="function")
+#
+# so the session is closed, and its connection returned to the pool, as soon
+# as the handler has returned and its response is serialized, rather than
+# after the response has been sent. Every Depends() of the same dependency
+# must use the same scope to share one session per request.
+
+
 def get_db():
-    db = SessionLocal()
+    db = LazySession(SessionLocal)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes; may be served by a replica"""
+    db = LazySession(lambda: open_read_session(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+class QueryBudgetExceeded(AssertionError):
+    """An endpoint ran more SQL statements than its declared budget"""
+
+
+class QueryBudgetOverages:
+    """Endpoints that ran over their budget in this worker, for tests and /metrics/query-budget"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, count: int, budget: int) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(route, {"budget": budget, "max_statements": 0, "times": 0})
+            entry["budget"] = budget
+            entry["max_statements"] = max(entry["max_statements"], count)
+            entry["times"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {route: dict(entry) for route, entry in self._routes.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def assert_within_budget(self) -> None:
+        """For tests: raise QueryBudgetExceeded if any endpoint went over its budget"""
+        overages = self.stats()
+        if overages:
+            raise QueryBudgetExceeded(
+                "; ".join(
+                    f"{route} ran {entry['max_statements']} SQL statements, budget is {entry['budget']}"
+                    for route, entry in overages.items()
+                )
+            )
+
+
+query_budget_overages = QueryBudgetOverages()
+
+
+def query_budget(max_statements: int):
+    """
+    Dependency declaring the most SQL statements an endpoint may run,
+    counting its auth/session dependencies too:
+
+        @router.get("/", dependencies=[Depends(query_budget(2))])
+
+    Uses the per-request counts from db.instrumentation, so it is a no-op
+    when DB_INSTRUMENTATION is off. Overages are logged and recorded in
+    query_budget_overages, never raised: by the time the check runs the
+    handler may already have committed, and failing the response would make
+    the client retry a write that succeeded.
+    """
+    def check_query_budget(request: Request):
+        yield
+        stats = instrumentation.current_stats()
+        if stats is None or stats.count <= max_statements:
+            return
+        query_budget_overages.record(stats.route, stats.count, max_statements)
+        message = (
+            f"{stats.route} ran {stats.count} SQL statements, "
+            f"budget is {max_statements}"
+        )
+        if QUERY_BUDGET_STRICT:
+            budget_logger.error(message)
+        else:
+            budget_logger.warning(message)
+
+    return check_query_budget
@@ -1,8 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from db.session import engine, Base
+import os
+import time
+from db.session import get_engine
+from db import instrumentation
+from db import migrations
+from db.replicas import record_write
+from utils.warmup import warmup
+from utils.upload_limits import UploadSizeLimitMiddleware
 
-from models import User, Product, Category, Cart, Order, OrderItem, Review, Report, Feedback
+from models import User, Product, Category, Cart, Order, OrderItem, Review, Report, Feedback, ImageUpload, UploadJob, SellerDailySales, InventoryAlert
 
 from routers.user_routes import userrouter
 from routers.product_routes import productrouter
@@ -15,6 +23,12 @@ from routers.report_routes import router as report_router
 from routers.upload_routes import router as upload_router
 from routers.seller_routes import router as seller_router
 from routers.feedback_routes import router as feedback_router
+from routers.metrics_routes import router as metrics_router
+from routers.media_routes import router as media_router
+from utils.storage import STORAGE_BACKEND
+
+# Local development convenience: apply pending migrations on startup instead of failing
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() in ("1", "true", "yes")
 
 app = FastAPI(title="UZHAVAN PLANET API", version="1.0.0")
 
@@ -27,28 +41,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-Base.metadata.create_all(bind=engine)
+# Oversized upload bodies are refused before multipart parsing spools them
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Read-your-writes: after a successful mutation the caller's reads stay on the primary
+@app.middleware("http")
+async def track_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        record_write(request)
+    return response
 
-# Auto-migration for missing columns
+# Per-request SQL count and DB time, reported in the Server-Timing header
+@app.middleware("http")
+async def instrument_queries(request: Request, call_next):
+    if not instrumentation.DB_INSTRUMENTATION:
+        return await call_next(request)
+    start = time.perf_counter()
+    token = instrumentation.start_request(request.scope)
+    try:
+        response = await call_next(request)
+        stats = instrumentation.current_stats()
+        response.headers["Server-Timing"] = stats.server_timing(time.perf_counter() - start)
+        return response
+    finally:
+        instrumentation.end_request(token)
+
+# Schema changes are applied by `python migrate.py upgrade`; startup only checks the version
 @app.on_event("startup")
-def migrate_db():
-    from sqlalchemy import text
-    from db.session import engine
-    with engine.connect() as conn:
-        try:
-            # Check if tables exist first by trying a simple query, 
-            # though create_all should have handled it.
-            conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS image_url_2 TEXT"))
-            conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS image_url_3 TEXT"))
-            conn.commit()
-            print("Successfully checked/added missing columns.")
-        except Exception as e:
-            print(f"Migration shadow error (safe to ignore if columns exist): {e}")
+def check_schema_version():
+    engine = get_engine()
+    current = migrations.current_version(engine)
+    latest = migrations.latest_version()
+    if current >= latest:
+        return
+    if DB_AUTO_MIGRATE:
+        migrations.upgrade(engine)
+        return
+    raise RuntimeError(
+        f"Database schema is at version {current} but this code needs {latest}. "
+        "Run `python migrate.py upgrade` (or set DB_AUTO_MIGRATE=true for local development)."
+    )
+
+# Heavy one-time initialisation runs in the background; /ready turns 200 when it is done
+@app.on_event("startup")
+def start_warmup():
+    warmup.start()
 
 @app.get("/")
 def greet():
     return {"message":"hello world"}
 
+@app.get("/health")
+def health():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    """Readiness: 503 until the warm-up steps have finished"""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
 app.include_router(userrouter)
 app.include_router(productrouter)
 app.include_router(cartrouter)
@@ -60,4 +114,7 @@ app.include_router(report_router)
 app.include_router(upload_router)
 app.include_router(seller_router)
 app.include_router(feedback_router)
+app.include_router(metrics_router)
+if STORAGE_BACKEND == "local":
+    app.include_router(media_router)
 
@@ -1,4 +1,12 @@
-from sqlalchemy import create_engine, text
+"""
+Schema migration CLI
+
+    python migrate.py upgrade [--to VERSION]   apply pending migrations
+    python migrate.py current                  show the applied schema version
+    python migrate.py history                  list migrations and whether they are applied
+"""
+import argparse
+from sqlalchemy import create_engine
 import os
 from dotenv import load_dotenv
 
@@ -6,40 +14,42 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-def migrate():
+
+def main():
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_cmd = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_cmd.add_argument("--to", type=int, default=None, help="stop after this version")
+    commands.add_parser("current", help="show the applied schema version")
+    commands.add_parser("history", help="list migrations")
+    args = parser.parse_args()
+
     if not DATABASE_URL:
         print("Error: DATABASE_URL not found in .env")
-        return
+        return 1
+
+    # Imported here so `--help` works without a database configured
+    from db import migrations
 
     print(f"Connecting to: {DATABASE_URL.split('@')[1] if '@' in DATABASE_URL else 'DB'}")
     engine = create_engine(DATABASE_URL)
-    
-    with engine.connect() as conn:
-        print("Checking for missing columns in 'products' table...")
-        
-        # Add image_url_2
-        try:
-            conn.execute(text("ALTER TABLE products ADD COLUMN image_url_2 TEXT"))
-            conn.commit()
-            print("Added image_url_2 column.")
-        except Exception as e:
-            if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
-                print("Column image_url_2 already exists. Skipping.")
-            else:
-                print(f"Error adding image_url_2: {e}")
-
-        # Add image_url_3
-        try:
-            conn.execute(text("ALTER TABLE products ADD COLUMN image_url_3 TEXT"))
-            conn.commit()
-            print("Added image_url_3 column.")
-        except Exception as e:
-            if "already exists" in str(e).lower() or "duplicate column" in str(e).lower():
-                print("Column image_url_3 already exists. Skipping.")
-            else:
-                print(f"Error adding image_url_3: {e}")
-
-        print("Migration completed.")
+
+    if args.command == "upgrade":
+        applied = migrations.upgrade(engine, target=args.to)
+        if applied:
+            print(f"Migration completed. Schema is at version {migrations.current_version(engine)}.")
+        else:
+            print(f"Nothing to do. Schema is at version {migrations.current_version(engine)}.")
+    elif args.command == "current":
+        print(f"Current: {migrations.current_version(engine)} (latest: {migrations.latest_version()})")
+    elif args.command == "history":
+        with engine.connect() as conn:
+            done = set(migrations.applied_versions(conn))
+        for migration in migrations.load_migrations():
+            mark = "x" if migration.VERSION in done else " "
+            print(f"[{mark}] {migration.VERSION:04d}  {migration.DESCRIPTION}")
+    return 0
+
 
 if __name__ == "__main__":
-    migrate()
+    raise SystemExit(main())
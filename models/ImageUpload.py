@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from db.session import Base
+from datetime import datetime
+
+class ImageUpload(Base):
+    """Stored images keyed by the SHA-256 of the uploaded bytes, so re-uploads reuse the URLs"""
+    __tablename__ = 'image_uploads'
+    content_hash = Column(String(64), primary_key=True)
+    url = Column(Text, nullable=False)
+    card_url = Column(Text, nullable=True)
+    thumbnail_url = Column(Text, nullable=True)
+    size_bytes = Column(Integer)
+    uploaded_by = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from db.session import Base
+from datetime import datetime
+
+class InventoryAlert(Base):
+    """A product crossed its reorder threshold; queued until the seller acknowledges it"""
+    __tablename__ = 'inventory_alerts'
+    id = Column(Integer, primary_key=True)
+    seller_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
+    kind = Column(String(20), nullable=False)  # low_stock, out_of_stock
+    stock_quantity = Column(Integer, nullable=False)
+    reorder_threshold = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    seen_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index(
+            'ix_inventory_alerts_unseen', seller_id, id,
+            postgresql_where=seen_at.is_(None),
+            sqlite_where=seen_at.is_(None),
+        ),
+    )
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Numeric, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from db.session import Base
 from datetime import datetime
@@ -13,11 +13,25 @@ class Product(Base):
     description = Column(Text)
     price = Column(Numeric(10, 2), nullable=False)
     stock_quantity = Column(Integer, default=0)
+    # Low-stock alert level; 0 alerts only when the product runs out
+    reorder_threshold = Column(Integer, nullable=False, default=0, server_default='0')
     image_url = Column(Text)
     image_url_2 = Column(Text, nullable=True)
     image_url_3 = Column(Text, nullable=True)
+    # Downsized variants of image_url for catalog cards and thumbnails
+    card_image_url = Column(Text, nullable=True)
+    thumbnail_url = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Only products at or below their threshold are indexed, so the seller's alert list is a small index scan
+    __table_args__ = (
+        Index(
+            'ix_products_low_stock', seller_id, stock_quantity,
+            postgresql_where=stock_quantity <= reorder_threshold,
+            sqlite_where=stock_quantity <= reorder_threshold,
+        ),
+    )
+
     seller = relationship("User", back_populates="products")
     carts = relationship("Cart", back_populates="product")
     category = relationship("Category", back_populates="products")
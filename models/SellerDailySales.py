@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Date, Numeric, ForeignKey
+from db.session import Base
+
+class SellerDailySales(Base):
+    """
+    Sales per seller, product and (UTC) day, maintained at checkout and cancel
+    by utils/sales_rollup.py; cancelled orders are not counted
+    """
+    __tablename__ = 'seller_daily_sales'
+    # Seller first, then day: analytics read one seller's date range
+    seller_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey('products.id', ondelete='CASCADE'), primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(12, 2), nullable=False, default=0)
+    order_count = Column(Integer, nullable=False, default=0)  # orders containing the product
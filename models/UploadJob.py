@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from db.session import Base
+from datetime import datetime
+
+class UploadJob(Base):
+    """Background image upload (POST /upload/images?background=true), polled by the client"""
+    __tablename__ = 'upload_jobs'
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, done, failed
+    file_count = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)  # {"urls", "images", "errors"} as returned by the sync endpoint
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
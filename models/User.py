@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from db.session import Base
 from datetime import datetime
@@ -16,8 +16,15 @@ class User(Base):
     phone = Column(String(20), nullable=False)
     address = Column(Text, nullable=False)
     role = Column(String(50), default='customer')
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')  # bump to revoke issued tokens
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Case-insensitive lookups for login; also makes uniqueness case-insensitive
+    __table_args__ = (
+        Index('ix_users_username_lower', func.lower(username), unique=True),
+        Index('ix_users_email_lower', func.lower(email), unique=True),
+    )
+
     carts = relationship("Cart", back_populates="user")
     orders = relationship("Order", back_populates="user")
     reviews = relationship("Review", back_populates="user")
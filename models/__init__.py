@@ -7,3 +7,7 @@ from .OrderItem import OrderItem
 from .Review import Review
 from .Report import Report
 from .Feedback import Feedback
+from .ImageUpload import ImageUpload
+from .UploadJob import UploadJob
+from .SellerDailySales import SellerDailySales
+from .InventoryAlert import InventoryAlert
@@ -4,28 +4,31 @@ Cart routes - Shopping cart management
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.User import User
 from models.Product import Product
 from models.Cart import Cart
 from schemas.cart import CartItemCreate, CartItemUpdate, CartItemResponse
-from dependencies import get_db
-from auth import get_current_user, get_current_buyer
+from db.session import DB_ASYNC
+from db import queries
+from dependencies import get_db, get_async_db, query_budget
+from auth import get_current_user, get_current_buyer, get_current_buyer_async
 
 cartrouter = APIRouter(prefix="/cart", tags=["Shopping Cart"])
 
 
-@cartrouter.post("/", response_model=CartItemResponse, status_code=status.HTTP_201_CREATED)
+@cartrouter.post("/", response_model=CartItemResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(6))])
 def add_to_cart(
     cart_item: CartItemCreate,
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Add a product to cart (Buyer only)
     Protected route - requires buyer authentication
     """
     # Check if product exists and has stock
-    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+    product = db.execute(queries.product_by_id(cart_item.product_id)).scalar_one_or_none()
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,44 +93,25 @@ def add_to_cart(
     }
 
 
-@cartrouter.get("/", response_model=dict)
-def get_cart(
-    current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
-):
-    """
-    Get current user's cart with all items
-    Protected route - requires buyer authentication
-    """
-    cart_items = db.query(Cart).filter(Cart.user_id == current_user.id).all()
-    
-    if not cart_items:
-        return {
-            "items": [],
-            "total_items": 0,
-            "total_amount": 0.0
-        }
-    
+def _cart_summary(rows):
     items = []
     total_amount = 0.0
     
-    for cart_item in cart_items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        if product:
-            subtotal = float(product.price) * cart_item.quantity
-            total_amount += subtotal
-            
-            items.append({
-                "cart_id": cart_item.cart_id,
-                "user_id": cart_item.user_id,
-                "product_id": cart_item.product_id,
-                "quantity": cart_item.quantity,
-                "product_name": product.name,
-                "product_price": float(product.price),
-                "product_image": product.image_url,
-                "product_stock": product.stock_quantity,
-                "subtotal": subtotal
-            })
+    for cart_item, product in rows:
+        subtotal = float(product.price) * cart_item.quantity
+        total_amount += subtotal
+        
+        items.append({
+            "cart_id": cart_item.cart_id,
+            "user_id": cart_item.user_id,
+            "product_id": cart_item.product_id,
+            "quantity": cart_item.quantity,
+            "product_name": product.name,
+            "product_price": float(product.price),
+            "product_image": product.image_url,
+            "product_stock": product.stock_quantity,
+            "subtotal": subtotal
+        })
     
     return {
         "items": items,
@@ -136,12 +120,37 @@ def get_cart(
     }
 
 
-@cartrouter.put("/{cart_id}", response_model=CartItemResponse)
+def get_cart(
+    current_user: User = Depends(get_current_buyer),
+    db: Session = Depends(get_db, scope="function")
+):
+    """
+    Get current user's cart with all items
+    Protected route - requires buyer authentication
+    """
+    return _cart_summary(db.execute(queries.cart_with_products(current_user.id)).all())
+
+
+async def get_cart_async(
+    current_user: User = Depends(get_current_buyer_async),
+    db: AsyncSession = Depends(get_async_db, scope="function")
+):
+    """
+    Get current user's cart with all items
+    Protected route - requires buyer authentication
+    """
+    return _cart_summary((await db.execute(queries.cart_with_products(current_user.id))).all())
+
+
+cartrouter.get("/", response_model=dict, dependencies=[Depends(query_budget(2))])(get_cart_async if DB_ASYNC else get_cart)
+
+
+@cartrouter.put("/{cart_id}", response_model=CartItemResponse, dependencies=[Depends(query_budget(5))])
 def update_cart_item(
     cart_id: int,
     cart_update: CartItemUpdate,
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Update cart item quantity
@@ -159,7 +168,7 @@ def update_cart_item(
         )
     
     # Check stock availability
-    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+    product = db.execute(queries.product_by_id(cart_item.product_id)).scalar_one_or_none()
     if product.stock_quantity < cart_update.quantity:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -182,11 +191,11 @@ def update_cart_item(
     }
 
 
-@cartrouter.delete("/{cart_id}", status_code=status.HTTP_204_NO_CONTENT)
+@cartrouter.delete("/{cart_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(3))])
 def remove_from_cart(
     cart_id: int,
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Remove item from cart
@@ -209,10 +218,10 @@ def remove_from_cart(
     return None
 
 
-@cartrouter.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+@cartrouter.delete("/", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(2))])
 def clear_cart(
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Clear all items from cart
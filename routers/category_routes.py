@@ -2,12 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from models.Category import Category
 from schemas.category import CategoryCreate, Category as CategorySchema
-from dependencies import get_db
+from dependencies import get_db, get_read_db
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.post("/", response_model=CategorySchema)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
+def create_category(category: CategoryCreate, db: Session = Depends(get_db, scope="function")):
     db_category = Category(name=category.name, description=category.description)
     db.add(db_category)
     db.commit()
@@ -15,6 +15,6 @@ def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     return db_category
 
 @router.get("/", response_model=list[CategorySchema])
-def read_categories(db: Session = Depends(get_db)):
+def read_categories(db: Session = Depends(get_read_db, scope="function")):
     return db.query(Category).all()
 
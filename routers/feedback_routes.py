@@ -14,7 +14,7 @@ router = APIRouter(prefix="/feedback", tags=["Feedback"])
 @router.post("", response_model=FeedbackResponse, status_code=status.HTTP_201_CREATED)
 def create_feedback(
     feedback_in: FeedbackCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     # Handled current_user as optional for guest feedback
     token: Optional[str] = Depends(oauth2_scheme)
 ):
@@ -46,7 +46,7 @@ def create_feedback(
 
 @router.get("", response_model=List[FeedbackResponse])
 def get_all_feedback(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db, scope="function"),
     current_user: User = Depends(get_current_seller) # Only sellers/admins should see all feedback?
 ):
     """
@@ -0,0 +1,26 @@
+"""
+Serves images kept by the local storage backend (STORAGE_BACKEND=local).
+Keys are unique per upload, so responses can be cached for a year.
+"""
+import os
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from utils.storage import LocalStorage, STORAGE_LOCAL_ROOT, STORAGE_LOCAL_URL
+
+router = APIRouter(tags=["Media"])
+
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_local_storage = LocalStorage(STORAGE_LOCAL_ROOT, STORAGE_LOCAL_URL)
+
+
+@router.get("/media/{key:path}", include_in_schema=False)
+def get_media(key: str):
+    """Stream a stored file; FileResponse uses sendfile where the server supports it"""
+    try:
+        path = _local_storage.path(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, headers={"Cache-Control": MEDIA_CACHE_CONTROL})
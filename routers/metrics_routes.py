@@ -0,0 +1,96 @@
+"""
+Metrics routes - Runtime counters for capacity tuning
+
+Internal only: they expose replica hosts and pool internals. A request is
+served when it comes from METRICS_ALLOWED_NETWORKS (loopback by default), or
+carries METRICS_TOKEN in the X-Metrics-Token header when a token is set.
+Behind a reverse proxy every client appears to come from the proxy's
+address, so set METRICS_TOKEN rather than allowing the proxy's network.
+"""
+import hmac
+import ipaddress
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from db.session import get_pool_stats
+from db.replicas import get_replica_stats
+from utils.rate_limit import login_throttle
+from utils.storage import STORAGE_BACKEND, storage_breaker
+from utils.upload_jobs import runner as upload_job_runner
+from utils.seller_cache import dashboard_cache
+from dependencies import query_budget_overages
+
+METRICS_ALLOWED_NETWORKS = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv("METRICS_ALLOWED_NETWORKS", "127.0.0.0/8,::1/128").split(",")
+    if network.strip()
+]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+def _from_allowed_network(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_NETWORKS)
+
+
+def require_internal(request: Request) -> None:
+    """Refuse metrics requests from outside the allowed networks unless they carry the token"""
+    token = request.headers.get("x-metrics-token")
+    if METRICS_TOKEN and token and hmac.compare_digest(token, METRICS_TOKEN):
+        return
+    if request.client is not None and _from_allowed_network(request.client.host):
+        return
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are internal")
+
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"], dependencies=[Depends(require_internal)])
+
+
+@router.get("/login-throttle")
+def get_login_throttle_stats():
+    """
+    Login throttling counters for this worker
+    hash_checks_avoided = attempts rejected before the user lookup and bcrypt check
+    """
+    return login_throttle.stats()
+
+
+@router.get("/db-pool")
+def get_db_pool_stats():
+    """
+    Connection pool usage for this worker: checked-out/overflow connections and checkout wait times
+    """
+    stats = get_pool_stats()
+    stats["replicas"] = get_replica_stats()
+    return stats
+
+
+@router.get("/storage")
+def get_storage_stats():
+    """
+    Image storage circuit breaker for this worker: state (closed/open/half_open),
+    call/failure/rejected counters, plus background upload jobs pending
+    """
+    stats = storage_breaker.stats()
+    stats["backend"] = STORAGE_BACKEND
+    stats["upload_jobs_pending"] = upload_job_runner.pending
+    return stats
+
+
+@router.get("/seller-stats-cache")
+def get_seller_stats_cache_stats():
+    """
+    Seller dashboard stats cache for this worker: entries, hits and misses
+    """
+    return dashboard_cache.stats()
+
+
+@router.get("/query-budget")
+def get_query_budget_stats():
+    """
+    Endpoints that ran more SQL statements than their declared query budget in this worker,
+    with the budget, the most statements seen and how many requests went over
+    """
+    return query_budget_overages.stats()
@@ -10,7 +10,7 @@ from sqlalchemy import text
 router = APIRouter(prefix="/order_items", tags=["order_items"])
 
 @router.post("/", response_model=OrderItemSchema)
-def create_order_item(order_item: OrderItemCreate, db: Session = Depends(get_db)):
+def create_order_item(order_item: OrderItemCreate, db: Session = Depends(get_db, scope="function")):
     db_order_item = OrderItem(**order_item.dict())
     db.add(db_order_item)
     db.commit()
@@ -18,7 +18,7 @@ def create_order_item(order_item: OrderItemCreate, db: Session = Depends(get_db)
     return db_order_item
 
 @router.get("/")
-def get_order_items(db: Session = Depends(get_db)):
+def get_order_items(db: Session = Depends(get_db, scope="function")):
     query = text("""
         SELECT oi.*, p.name as product_name 
         FROM order_items oi 
@@ -28,14 +28,14 @@ def get_order_items(db: Session = Depends(get_db)):
     return [dict(row._mapping) for row in result]
 
 @router.get("/{order_item_id}", response_model=OrderItemSchema)
-def get_order_item(order_item_id: int, db: Session = Depends(get_db)):
+def get_order_item(order_item_id: int, db: Session = Depends(get_db, scope="function")):
     db_order_item = db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
     if not db_order_item:
         raise HTTPException(status_code=404, detail="OrderItem not found")
     return db_order_item
 
 @router.put("/{order_item_id}", response_model=OrderItemSchema)
-def update_order_item(order_item_id: int, order_item: OrderItemUpdate, db: Session = Depends(get_db)):
+def update_order_item(order_item_id: int, order_item: OrderItemUpdate, db: Session = Depends(get_db, scope="function")):
     db_order_item = db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
     if not db_order_item:
         raise HTTPException(status_code=404, detail="OrderItem not found")
@@ -49,7 +49,7 @@ def update_order_item(order_item_id: int, order_item: OrderItemUpdate, db: Sessi
     return db_order_item
 
 @router.delete("/{order_item_id}")
-def delete_order_item(order_item_id: int, db: Session = Depends(get_db)):
+def delete_order_item(order_item_id: int, db: Session = Depends(get_db, scope="function")):
     db_order_item = db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
     if not db_order_item:
         raise HTTPException(status_code=404, detail="OrderItem not found")
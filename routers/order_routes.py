@@ -4,33 +4,42 @@ Order routes - Order management for buyers and sellers
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, text
 from models.User import User
 from models.Order import Order
 from models.OrderItem import OrderItem
 from models.Product import Product
 from models.Cart import Cart
 from schemas.order import OrderCreate, OrderResponse, OrderStatusUpdate
-from dependencies import get_db
-from auth import get_current_user, get_current_buyer, get_current_seller
+from db.session import DB_ASYNC
+from db import queries
+from dependencies import get_db, get_read_db, get_async_db, query_budget
+from auth import get_current_user, get_current_buyer, get_current_buyer_async, get_current_seller
+from utils.seller_cache import invalidate_seller_stats
+from utils import sales_rollup
+from utils.inventory_alerts import check_stock, queue_alerts
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(9))])
 def create_order(
     order: OrderCreate,
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Create a new order from cart items (Buyer only)
     Protected route - requires buyer authentication
     """
-    # Get cart items
-    cart_items = db.query(Cart).filter(Cart.user_id == current_user.id).all()
+    # Get cart items with their products in one query
+    cart_rows = db.query(Cart, Product)\
+        .outerjoin(Product, Product.id == Cart.product_id)\
+        .filter(Cart.user_id == current_user.id)\
+        .all()
     
-    if not cart_items:
+    if not cart_rows:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cart is empty"
@@ -38,11 +47,8 @@ def create_order(
     
     # Validate stock and calculate total
     total_amount = 0.0
-    order_items_data = []
     
-    for cart_item in cart_items:
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
-        
+    for cart_item, product in cart_rows:
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -57,12 +63,6 @@ def create_order(
         
         item_total = float(product.price) * cart_item.quantity
         total_amount += item_total
-        
-        order_items_data.append({
-            "product_id": cart_item.product_id,
-            "quantity": cart_item.quantity,
-            "price": float(product.price)
-        })
     
     # Create order
     new_order = Order(
@@ -72,27 +72,37 @@ def create_order(
     )
     
     db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    db.flush()  # assigns new_order.id
     
-    # Create order items and reduce stock
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            product_id=item_data["product_id"],
-            quantity=item_data["quantity"],
-            price=item_data["price"]
-        )
-        db.add(order_item)
-        
-        # Reduce product stock
-        product = db.query(Product).filter(Product.id == item_data["product_id"]).first()
-        product.stock_quantity -= item_data["quantity"]
+    # Create order items (one executemany) and reduce stock (the products are already loaded)
+    db.execute(insert(OrderItem), [
+        {
+            "order_id": new_order.id,
+            "product_id": cart_item.product_id,
+            "quantity": cart_item.quantity,
+            "price": float(product.price)
+        }
+        for cart_item, product in cart_rows
+    ])
+    alerts = []
+    for cart_item, product in cart_rows:
+        old_stock = product.stock_quantity
+        product.stock_quantity -= cart_item.quantity
+        alerts.append(check_stock(product, old_stock))
+    queue_alerts(db, alerts)
+    
+    sales_rollup.record_order(db, new_order.order_date, [
+        (product.seller_id, cart_item.product_id, cart_item.quantity, product.price)
+        for cart_item, product in cart_rows
+    ])
+    
+    seller_ids = {product.seller_id for _, product in cart_rows}
     
     # Clear cart
     db.query(Cart).filter(Cart.user_id == current_user.id).delete()
     
     db.commit()
+    invalidate_seller_stats(*seller_ids)
     db.refresh(new_order)
     
     return {
@@ -105,35 +115,26 @@ def create_order(
     }
 
 
-@router.get("/my-orders", response_model=List[dict])
-def get_my_orders(
-    current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
-):
-    """
-    Get buyer's order history
-    Protected route - requires buyer authentication
-    """
-    query = text("""
-        SELECT 
-            o.id as order_id,
-            o.order_date,
-            o.total_amount,
-            o.status,
-            oi.product_id,
-            oi.quantity,
-            oi.price as item_price,
-            p.name as product_name,
-            p.image_url
-        FROM orders o
-        JOIN order_items oi ON o.id = oi.order_id
-        JOIN products p ON oi.product_id = p.id
-        WHERE o.user_id = :user_id
-        ORDER BY o.order_date DESC
-    """)
-    
-    results = db.execute(query, {"user_id": current_user.id}).fetchall()
-    
+MY_ORDERS_QUERY = text("""
+    SELECT 
+        o.id as order_id,
+        o.order_date,
+        o.total_amount,
+        o.status,
+        oi.product_id,
+        oi.quantity,
+        oi.price as item_price,
+        p.name as product_name,
+        p.image_url
+    FROM orders o
+    JOIN order_items oi ON o.id = oi.order_id
+    JOIN products p ON oi.product_id = p.id
+    WHERE o.user_id = :user_id
+    ORDER BY o.order_date DESC
+""")
+
+
+def _group_my_orders(results):
     # Group items by order
     orders_map = {}
     for row in results:
@@ -156,10 +157,39 @@ def get_my_orders(
     return list(orders_map.values())
 
 
-@router.get("/seller/orders", response_model=List[dict])
+def get_my_orders(
+    current_user: User = Depends(get_current_buyer),
+    db: Session = Depends(get_read_db, scope="function")
+):
+    """
+    Get buyer's order history
+    Protected route - requires buyer authentication
+    """
+    results = db.execute(MY_ORDERS_QUERY, {"user_id": current_user.id}).fetchall()
+    return _group_my_orders(results)
+
+
+async def get_my_orders_async(
+    current_user: User = Depends(get_current_buyer_async),
+    db: AsyncSession = Depends(get_async_db, scope="function")
+):
+    """
+    Get buyer's order history
+    Protected route - requires buyer authentication
+    """
+    results = (await db.execute(MY_ORDERS_QUERY, {"user_id": current_user.id})).fetchall()
+    return _group_my_orders(results)
+
+
+router.get("/my-orders", response_model=List[dict], dependencies=[Depends(query_budget(2))])(
+    get_my_orders_async if DB_ASYNC else get_my_orders
+)
+
+
+@router.get("/seller/orders", response_model=List[dict], dependencies=[Depends(query_budget(2))])
 def get_seller_orders(
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db, scope="function")
 ):
     """
     Get all orders containing seller's products
@@ -214,11 +244,11 @@ def get_seller_orders(
     return list(orders_map.values())
 
 
-@router.get("/{order_id}", response_model=dict)
+@router.get("/{order_id}", response_model=dict, dependencies=[Depends(query_budget(3))])
 def get_order_details(
     order_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Get order details by ID
@@ -239,15 +269,16 @@ def get_order_details(
             detail="You can only view your own orders"
         )
     
-    # Get order items
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+    # Get order items with their products in one query
+    order_items = db.query(OrderItem, Product)\
+        .outerjoin(Product, Product.id == OrderItem.product_id)\
+        .filter(OrderItem.order_id == order_id)\
+        .all()
     
     items = []
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        
+    for item, product in order_items:
         # If seller, only show items for their products
-        if current_user.role == "seller" and product.seller_id != current_user.id:
+        if current_user.role == "seller" and (not product or product.seller_id != current_user.id):
             continue
         
         items.append({
@@ -273,12 +304,12 @@ def get_order_details(
     }
 
 
-@router.put("/{order_id}/status", response_model=dict)
+@router.put("/{order_id}/status", response_model=dict, dependencies=[Depends(query_budget(7))])
 def update_order_status(
     order_id: int,
     status_update: OrderStatusUpdate,
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Update order status (Seller only)
@@ -293,23 +324,27 @@ def update_order_status(
         )
     
     # Verify seller has products in this order
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    has_seller_products = False
-    
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product and product.seller_id == current_user.id:
-            has_seller_products = True
-            break
+    seller_ids = db.execute(queries.order_seller_ids(order_id)).scalars().all()
     
-    if not has_seller_products:
+    if current_user.id not in seller_ids:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only update orders containing your products"
         )
     
+    # Cancelling (or un-cancelling) an order moves its sales out of (or back into) the rollup
+    was_cancelled = order.status == sales_rollup.CANCELLED
+    is_cancelled = status_update.status == sales_rollup.CANCELLED
+    if was_cancelled != is_cancelled:
+        lines = sales_rollup.order_lines(db, order_id)
+        if is_cancelled:
+            sales_rollup.remove_order(db, order.order_date, lines)
+        else:
+            sales_rollup.record_order(db, order.order_date, lines)
+    
     order.status = status_update.status
     db.commit()
+    invalidate_seller_stats(*seller_ids)
     db.refresh(order)
     
     return {
@@ -319,11 +354,11 @@ def update_order_status(
     }
 
 
-@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(6))])
 def cancel_order(
     order_id: int,
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Cancel an order (Buyer only, only if status is 'pending')
@@ -347,14 +382,23 @@ def cancel_order(
         )
     
     # Restore stock
-    order_items = db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-    for item in order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            product.stock_quantity += item.quantity
+    order_items = db.query(OrderItem, Product)\
+        .join(Product, Product.id == OrderItem.product_id)\
+        .filter(OrderItem.order_id == order_id)\
+        .all()
+    for item, product in order_items:
+        product.stock_quantity += item.quantity
+    
+    sales_rollup.remove_order(db, order.order_date, [
+        (product.seller_id, item.product_id, item.quantity, item.price)
+        for item, product in order_items
+    ])
+    
+    seller_ids = {product.seller_id for _, product in order_items}
     
     # Update status to cancelled
     order.status = "cancelled"
     db.commit()
+    invalidate_seller_stats(*seller_ids)
     
     return None
@@ -4,22 +4,27 @@ Product routes - CRUD operations for products
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select
 from models.User import User
 from models.Product import Product
 from models.Category import Category
 from schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductWithSeller
-from dependencies import get_db
+from db.session import DB_ASYNC
+from db import queries
+from dependencies import get_db, get_read_db, get_async_db, query_budget
 from auth import get_current_user, get_current_seller
+from utils.seller_cache import invalidate_seller_stats
+from utils.inventory_alerts import check_stock, queue_alerts
 
 productrouter = APIRouter(prefix="/products", tags=["Products"])
 
 
-@productrouter.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+@productrouter.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(query_budget(4))])
 def create_product(
     product: ProductCreate, 
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Create a new product (Seller only)
@@ -42,15 +47,19 @@ def create_product(
             description=product.description,
             price=product.price,
             stock_quantity=product.stock_quantity,
+            reorder_threshold=product.reorder_threshold,
             category_id=product.category_id,
             image_url=product.image_url,
             image_url_2=product.image_url_2,
-            image_url_3=product.image_url_3
+            image_url_3=product.image_url_3,
+            card_image_url=product.card_image_url,
+            thumbnail_url=product.thumbnail_url
         )
         
         db.add(new_product)
         db.commit()
         db.refresh(new_product)
+        invalidate_seller_stats(new_product.seller_id)
         
         return new_product
     except HTTPException:
@@ -61,7 +70,74 @@ def create_product(
         raise HTTPException(status_code=500, detail=f"Failed to create product: {str(e)}")
 
 
-@productrouter.get("/", response_model=List[ProductWithSeller])
+def _products_with_seller_query():
+    """Products joined with their seller's username and category name (one round trip)"""
+    return select(Product, User.username, Category.name)\
+        .outerjoin(User, User.id == Product.seller_id)\
+        .outerjoin(Category, Category.category_id == Product.category_id)
+
+
+def _product_listing_query(skip, limit, search, category_id, min_price, max_price, in_stock):
+    query = _products_with_seller_query()
+    
+    # Apply filters
+    if search:
+        query = query.where(
+            or_(
+                Product.name.ilike(f"%{search}%"),
+                Product.description.ilike(f"%{search}%")
+            )
+        )
+    
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    
+    if in_stock:
+        query = query.where(Product.stock_quantity > 0)
+    
+    # Pagination
+    return query.offset(skip).limit(limit)
+
+
+def _product_with_seller_dict(product, seller_username, category_name):
+    return {
+        "id": product.id,
+        "seller_id": product.seller_id,
+        "name": product.name,
+        "description": product.description,
+        "price": float(product.price) if product.price is not None else 0.0,
+        "stock_quantity": product.stock_quantity,
+        "reorder_threshold": product.reorder_threshold,
+        "category_id": product.category_id,
+        "image_url": product.image_url,
+        "image_url_2": product.image_url_2,
+        "image_url_3": product.image_url_3,
+        # Small variants for catalog pages; products saved before variants existed fall back to the original
+        "card_image_url": product.card_image_url or product.image_url,
+        "thumbnail_url": product.thumbnail_url or product.image_url,
+        "created_at": product.created_at,
+        "seller_username": seller_username,
+        "category_name": category_name
+    }
+
+
+def _product_listing(rows):
+    return [
+        _product_with_seller_dict(
+            product,
+            seller_username or "Unknown Seller",
+            category_name or "General"
+        )
+        for product, seller_username, category_name in rows
+    ]
+
+
 def get_all_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
@@ -70,72 +146,51 @@ def get_all_products(
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     in_stock: bool = False,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db, scope="function")
 ):
     """
     Get all products with optional filters
     Public route - no authentication required
     """
     try:
-        query = db.query(Product)
-        
-        # Apply filters
-        if search:
-            query = query.filter(
-                or_(
-                    Product.name.ilike(f"%{search}%"),
-                    Product.description.ilike(f"%{search}%")
-                )
-            )
-        
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-        
-        if min_price is not None:
-            query = query.filter(Product.price >= min_price)
-        
-        if max_price is not None:
-            query = query.filter(Product.price <= max_price)
-        
-        if in_stock:
-            query = query.filter(Product.stock_quantity > 0)
-        
-        # Get products with pagination
-        products = query.offset(skip).limit(limit).all()
-        
-        # Enrich with seller and category info
-        result = []
-        for product in products:
-            seller = db.query(User).filter(User.id == product.seller_id).first()
-            category = db.query(Category).filter(Category.category_id == product.category_id).first() if product.category_id else None
-            
-            product_dict = {
-                "id": product.id,
-                "seller_id": product.seller_id,
-                "name": product.name,
-                "description": product.description,
-                "price": float(product.price) if product.price is not None else 0.0,
-                "stock_quantity": product.stock_quantity,
-                "category_id": product.category_id,
-                "image_url": product.image_url,
-                "image_url_2": product.image_url_2,
-                "image_url_3": product.image_url_3,
-                "created_at": product.created_at,
-                "seller_username": seller.username if seller else "Unknown Seller",
-                "category_name": category.name if category else "General"
-            }
-            result.append(product_dict)
-        
-        return result
+        query = _product_listing_query(skip, limit, search, category_id, min_price, max_price, in_stock)
+        return _product_listing(db.execute(query).all())
     except Exception as e:
         print(f"CRITICAL ERROR in get_all_products: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
 
-@productrouter.get("/my-products", response_model=List[ProductResponse])
+async def get_all_products_async(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    search: Optional[str] = None,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: bool = False,
+    db: AsyncSession = Depends(get_async_db, scope="function")
+):
+    """
+    Get all products with optional filters
+    Public route - no authentication required
+    """
+    try:
+        query = _product_listing_query(skip, limit, search, category_id, min_price, max_price, in_stock)
+        return _product_listing((await db.execute(query)).all())
+    except Exception as e:
+        print(f"CRITICAL ERROR in get_all_products: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+
+productrouter.get("/", response_model=List[ProductWithSeller], dependencies=[Depends(query_budget(2))])(
+    get_all_products_async if DB_ASYNC else get_all_products
+)
+
+
+@productrouter.get("/my-products", response_model=List[ProductResponse], dependencies=[Depends(query_budget(2))])
 def get_my_products(
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db, scope="function")
 ):
     """
     Get all products created by the current seller
@@ -145,53 +200,49 @@ def get_my_products(
     return products
 
 
-@productrouter.get("/{product_id}", response_model=ProductWithSeller)
-def get_product_by_id(product_id: int, db: Session = Depends(get_db)):
-    """
-    Get a single product by ID
-    Public route - no authentication required
-    """
-    product = db.query(Product).filter(Product.id == product_id).first()
-    
-    if not product:
+def _product_detail(row):
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    
-    # Get seller and category info
-    seller = db.query(User).filter(User.id == product.seller_id).first()
-    category = db.query(Category).filter(Category.category_id == product.category_id).first() if product.category_id else None
-    
-    return {
-        "id": product.id,
-        "seller_id": product.seller_id,
-        "name": product.name,
-        "description": product.description,
-        "price": float(product.price),
-        "stock_quantity": product.stock_quantity,
-        "category_id": product.category_id,
-        "image_url": product.image_url,
-        "image_url_2": product.image_url_2,
-        "image_url_3": product.image_url_3,
-        "created_at": product.created_at,
-        "seller_username": seller.username if seller else None,
-        "category_name": category.name if category else None
-    }
+    product, seller_username, category_name = row
+    return _product_with_seller_dict(product, seller_username, category_name)
+
+
+def get_product_by_id(product_id: int, db: Session = Depends(get_read_db, scope="function")):
+    """
+    Get a single product by ID
+    Public route - no authentication required
+    """
+    return _product_detail(db.execute(queries.product_with_seller_by_id(product_id)).first())
 
 
-@productrouter.put("/{product_id}", response_model=ProductResponse)
+async def get_product_by_id_async(product_id: int, db: AsyncSession = Depends(get_async_db, scope="function")):
+    """
+    Get a single product by ID
+    Public route - no authentication required
+    """
+    return _product_detail((await db.execute(queries.product_with_seller_by_id(product_id))).first())
+
+
+productrouter.get("/{product_id}", response_model=ProductWithSeller, dependencies=[Depends(query_budget(1))])(
+    get_product_by_id_async if DB_ASYNC else get_product_by_id
+)
+
+
+@productrouter.put("/{product_id}", response_model=ProductResponse, dependencies=[Depends(query_budget(6))])
 def update_product(
     product_id: int,
     product_update: ProductUpdate,
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Update a product (Seller can only update their own products)
     Protected route - requires seller authentication
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = db.execute(queries.product_by_id(product_id)).scalar_one_or_none()
     
     if not product:
         raise HTTPException(
@@ -215,6 +266,9 @@ def update_product(
                 detail="Category not found"
             )
     
+    old_stock = product.stock_quantity
+    old_threshold = product.reorder_threshold
+    
     # Update product fields
     if product_update.name is not None:
         product.name = product_update.name
@@ -224,14 +278,26 @@ def update_product(
         product.price = product_update.price
     if product_update.stock_quantity is not None:
         product.stock_quantity = product_update.stock_quantity
+    if product_update.reorder_threshold is not None:
+        product.reorder_threshold = product_update.reorder_threshold
     if product_update.category_id is not None:
         product.category_id = product_update.category_id
     if product_update.image_url is not None:
+        if product_update.image_url != product.image_url:
+            # Variants of the old image no longer apply unless new ones are sent
+            product.card_image_url = None
+            product.thumbnail_url = None
         product.image_url = product_update.image_url
     if product_update.image_url_2 is not None:
         product.image_url_2 = product_update.image_url_2
     if product_update.image_url_3 is not None:
         product.image_url_3 = product_update.image_url_3
+    if product_update.card_image_url is not None:
+        product.card_image_url = product_update.card_image_url
+    if product_update.thumbnail_url is not None:
+        product.thumbnail_url = product_update.thumbnail_url
+    
+    queue_alerts(db, [check_stock(product, old_stock, old_threshold)])
     
     db.commit()
     db.refresh(product)
@@ -239,17 +305,17 @@ def update_product(
     return product
 
 
-@productrouter.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+@productrouter.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(query_budget(7))])
 def delete_product(
     product_id: int,
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Delete a product (Seller can only delete their own products)
     Protected route - requires seller authentication
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = db.execute(queries.product_by_id(product_id)).scalar_one_or_none()
     
     if not product:
         raise HTTPException(
@@ -264,7 +330,9 @@ def delete_product(
             detail="You can only delete your own products"
         )
     
+    seller_id = product.seller_id
     db.delete(product)
     db.commit()
-    
+    invalidate_seller_stats(seller_id)
+
     return None
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/reports", tags=["Reports"])
 def create_report(
     report_in: ReportCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Submit a new report (Buyer only)
@@ -40,7 +40,7 @@ def create_report(
 @router.get("/my-reports/", response_model=List[ReportResponse], include_in_schema=False)
 def get_my_reports(
     current_user: User = Depends(get_current_buyer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Get all reports submitted by the current user
@@ -51,7 +51,7 @@ def get_my_reports(
 @router.get("/seller/", response_model=List[ReportResponse], include_in_schema=False)
 def get_seller_reports(
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Get reports related to seller's orders (Seller only)
@@ -89,7 +89,7 @@ def update_report_status(
     report_id: int,
     status: str,
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Sellers can mark reports as resolved or closed
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from dependencies import get_db
+from dependencies import get_db, get_read_db
 from models.Review import Review
 from schemas.review import ReviewCreate, Review as ReviewSchema
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
 @router.post("/", response_model=ReviewSchema)
-def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
+def create_review(review: ReviewCreate, db: Session = Depends(get_db, scope="function")):
     db_review = Review(**review.dict())
     db.add(db_review)
     db.commit()
@@ -15,5 +15,5 @@ def create_review(review: ReviewCreate, db: Session = Depends(get_db)):
     return db_review
 
 @router.get("/", response_model=list[ReviewSchema])
-def read_reviews(db: Session = Depends(get_db)):
+def read_reviews(db: Session = Depends(get_read_db, scope="function")):
     return db.query(Review).all()
@@ -1,63 +1,160 @@
 """
 Seller routes - Dashboard analytics and seller-specific operations
 """
-from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, status, HTTPException
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
-from dependencies import get_db
+from sqlalchemy import func, select, text, update
+from dependencies import get_db, get_read_db, query_budget
+from db import queries
+from db.replicas import open_read_session
 from models.User import User
 from models.Product import Product
 from models.Order import Order
 from models.OrderItem import OrderItem
+from models.SellerDailySales import SellerDailySales
+from models.InventoryAlert import InventoryAlert
 from auth import get_current_seller
 from schemas.product import ProductResponse
+from utils.seller_cache import dashboard_cache
+from utils import sales_rollup
+from utils.inventory_alerts import check_stock, queue_alerts, OUT_OF_STOCK, LOW_STOCK
+from utils.order_export import stream_orders_csv
 
 router = APIRouter(prefix="/seller", tags=["Seller Dashboard"])
 
-@router.get("/dashboard")
+@router.get("/dashboard", dependencies=[Depends(query_budget(2))])
 def get_seller_dashboard_stats(
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Get seller dashboard statistics
+    Computed in one aggregate query and cached per seller until their products or orders change.
+    Cache fills read the primary: the writes that invalidated the entry were usually made by
+    other clients (buyers), so read-your-writes pinning would not keep a lagging replica's
+    totals out of the cache. A cache hit runs no stats query.
     """
-    # 1. Total Products
-    total_products = db.query(Product).filter(Product.seller_id == current_user.id).count()
-    
-    # 2. Total Orders & Revenue
-    # We need to join OrderItems with Products to filter by seller
-    query = db.query(
-        func.count(func.distinct(OrderItem.order_id)).label("total_orders"),
-        func.sum(OrderItem.price * OrderItem.quantity).label("total_revenue")
-    ).join(Product, OrderItem.product_id == Product.id)\
-     .filter(Product.seller_id == current_user.id)
-    
-    result = query.first()
-    total_orders = result.total_orders if result.total_orders else 0
-    total_revenue = float(result.total_revenue) if result.total_revenue else 0.0
-    
-    # 3. Pending Orders
-    pending_query = db.query(func.count(func.distinct(OrderItem.order_id)))\
-        .join(Product, OrderItem.product_id == Product.id)\
-        .join(Order, OrderItem.order_id == Order.id)\
-        .filter(Product.seller_id == current_user.id)\
-        .filter(Order.status == "pending")
-        
-    pending_orders = pending_query.scalar() or 0
-    
+    def compute():
+        result = db.execute(queries.seller_dashboard_stats(current_user.id)).one()
+        return {
+            "total_products": result.total_products or 0,
+            "total_orders": result.total_orders or 0,
+            "total_revenue": float(result.total_revenue) if result.total_revenue else 0.0,
+            "pending_orders": result.pending_orders or 0
+        }
+
+    return dashboard_cache.get_or_compute(current_user.id, compute)
+
+def _analytics_range(start: Optional[date], end: Optional[date]):
+    """Default to the last SALES_ANALYTICS_DEFAULT_DAYS days (UTC), and bound the range"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=sales_rollup.SALES_ANALYTICS_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    if (end - start).days + 1 > sales_rollup.SALES_ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {sales_rollup.SALES_ANALYTICS_MAX_DAYS} days"
+        )
+    return start, end
+
+
+@router.get("/analytics/sales", dependencies=[Depends(query_budget(2))])
+def get_sales_analytics(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    product_id: Optional[int] = None,
+    current_user: User = Depends(get_current_seller),
+    db: Session = Depends(get_read_db, scope="function")
+):
+    """
+    Units, revenue and order lines per day, week or month between start and end (inclusive, UTC days)
+    Read from the seller_daily_sales rollup; cancelled orders are excluded
+    """
+    start, end = _analytics_range(start, end)
+    query = select(
+        SellerDailySales.day,
+        func.sum(SellerDailySales.units),
+        func.sum(SellerDailySales.revenue),
+        func.sum(SellerDailySales.order_count)
+    ).where(
+        SellerDailySales.seller_id == current_user.id,
+        SellerDailySales.day >= start,
+        SellerDailySales.day <= end
+    )
+    if product_id is not None:
+        query = query.where(SellerDailySales.product_id == product_id)
+    rows = db.execute(query.group_by(SellerDailySales.day)).all()
+
+    series = sales_rollup.bucket_series(rows, start, end, granularity)
     return {
-        "total_products": total_products,
-        "total_orders": total_orders,
-        "total_revenue": total_revenue,
-        "pending_orders": pending_orders
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "series": series,
+        "totals": {
+            "units": sum(point["units"] for point in series),
+            "revenue": round(sum(point["revenue"] for point in series), 2),
+            "order_lines": sum(point["order_lines"] for point in series)
+        }
+    }
+
+
+@router.get("/analytics/top-products", dependencies=[Depends(query_budget(2))])
+def get_top_products(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    sort: str = Query("revenue", pattern="^(revenue|units)$"),
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_seller),
+    db: Session = Depends(get_read_db, scope="function")
+):
+    """
+    Seller's best-selling products between start and end, by revenue or units
+    Read from the seller_daily_sales rollup; cancelled orders are excluded
+    """
+    start, end = _analytics_range(start, end)
+    units = func.sum(SellerDailySales.units).label("units")
+    revenue = func.sum(SellerDailySales.revenue).label("revenue")
+    orders = func.sum(SellerDailySales.order_count).label("orders")
+    query = select(SellerDailySales.product_id, Product.name, units, revenue, orders)\
+        .join(Product, Product.id == SellerDailySales.product_id)\
+        .where(
+            SellerDailySales.seller_id == current_user.id,
+            SellerDailySales.day >= start,
+            SellerDailySales.day <= end
+        )\
+        .group_by(SellerDailySales.product_id, Product.name)\
+        .having(units > 0)\
+        .order_by((revenue if sort == "revenue" else units).desc(), SellerDailySales.product_id)\
+        .limit(limit)
+
+    return {
+        "start": start,
+        "end": end,
+        "products": [
+            {
+                "product_id": row.product_id,
+                "product_name": row.name,
+                "units": row.units or 0,
+                "revenue": float(row.revenue) if row.revenue else 0.0,
+                "orders": row.orders or 0
+            }
+            for row in db.execute(query).all()
+        ]
     }
 
 @router.get("/products", response_model=List[ProductResponse])
 def get_seller_products(
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db, scope="function")
 ):
     """
     Get all products created by the current seller
@@ -68,7 +165,7 @@ def get_seller_products(
 @router.get("/orders")
 def get_seller_orders(
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db, scope="function")
 ):
     """
     Get all orders containing seller's products
@@ -134,17 +231,43 @@ def get_seller_orders(
 
     return list(orders_map.values())
 
+@router.get("/orders/export")
+def export_seller_orders(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Depends(get_current_seller)
+):
+    """
+    Download all order lines for the seller's products as CSV, oldest first,
+    optionally limited to orders placed between start and end (inclusive)
+    Streamed through a server-side cursor, so any number of orders can be exported
+    """
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    filename = f"orders-{start or 'all'}-to-{end or 'latest'}.csv"
+    # The body is produced after this handler returns, so the export opens (and closes) its own session
+    db = open_read_session(request)
+    return StreamingResponse(
+        stream_orders_csv(db, current_user.id, start, end),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.put("/products/{product_id}/stock")
 def update_product_stock(
     product_id: int,
     stock: int,
     current_user: User = Depends(get_current_seller),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Update product stock quantity
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = db.execute(queries.product_by_id(product_id)).scalar_one_or_none()
     
     if not product:
         raise HTTPException(
@@ -158,7 +281,83 @@ def update_product_stock(
             detail="You can only update your own products"
         )
         
+    old_stock = product.stock_quantity
     product.stock_quantity = stock
+    queue_alerts(db, [check_stock(product, old_stock)])
     db.commit()
     
     return {"message": "Stock updated successfully", "new_stock": stock}
+
+
+@router.get("/inventory/alerts", dependencies=[Depends(query_budget(3))])
+def get_inventory_alerts(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_seller),
+    db: Session = Depends(get_read_db, scope="function")
+):
+    """
+    Products at or below their reorder threshold (out of stock first), served
+    from the ix_products_low_stock partial index, plus threshold-crossing alerts
+    not yet acknowledged (newest first)
+    """
+    products = db.execute(
+        select(Product.id, Product.name, Product.stock_quantity, Product.reorder_threshold)
+        .where(
+            Product.seller_id == current_user.id,
+            Product.stock_quantity <= Product.reorder_threshold
+        )
+        .order_by(Product.stock_quantity, Product.id)
+        .limit(limit)
+    ).all()
+    alerts = db.execute(
+        select(InventoryAlert, Product.name)
+        .outerjoin(Product, Product.id == InventoryAlert.product_id)
+        .where(InventoryAlert.seller_id == current_user.id, InventoryAlert.seen_at.is_(None))
+        .order_by(InventoryAlert.id.desc())
+        .limit(limit)
+    ).all()
+
+    return {
+        "products": [
+            {
+                "product_id": row.id,
+                "product_name": row.name,
+                "stock_quantity": row.stock_quantity,
+                "reorder_threshold": row.reorder_threshold,
+                "status": OUT_OF_STOCK if row.stock_quantity <= 0 else LOW_STOCK
+            }
+            for row in products
+        ],
+        "alerts": [
+            {
+                "id": alert.id,
+                "product_id": alert.product_id,
+                "product_name": product_name,
+                "kind": alert.kind,
+                "stock_quantity": alert.stock_quantity,
+                "reorder_threshold": alert.reorder_threshold,
+                "created_at": alert.created_at
+            }
+            for alert, product_name in alerts
+        ]
+    }
+
+@router.post("/inventory/alerts/ack", dependencies=[Depends(query_budget(3))])
+def acknowledge_inventory_alerts(
+    up_to_id: Optional[int] = None,
+    current_user: User = Depends(get_current_seller),
+    db: Session = Depends(get_db, scope="function")
+):
+    """
+    Mark the seller's queued inventory alerts as seen (all, or those with id <= up_to_id)
+    """
+    query = update(InventoryAlert).where(
+        InventoryAlert.seller_id == current_user.id,
+        InventoryAlert.seen_at.is_(None)
+    )
+    if up_to_id is not None:
+        query = query.where(InventoryAlert.id <= up_to_id)
+    result = db.execute(query.values(seen_at=datetime.utcnow()))
+    db.commit()
+
+    return {"acknowledged": result.rowcount}
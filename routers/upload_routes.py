@@ -1,59 +1,132 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
 from auth import get_current_seller
+from dependencies import get_read_db
 from models.User import User
-from utils.cloudinary_utils import upload_image
+from utils.upload_pool import UploadTimeout
+from utils.circuit_breaker import CircuitOpen
+from utils.storage import storage_breaker
+from utils.upload_limits import UPLOAD_MAX_FILES, UploadTooLarge, check_upload_size
+from utils.image_processing import InvalidImage
+from utils.image_store import store_image, store_images
+from utils import upload_jobs
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
+
+def _storage_unavailable(error: CircuitOpen) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Image storage is temporarily unavailable, please retry",
+        headers={"Retry-After": str(max(1, int(error.retry_after)))},
+    )
+
+
+def _check_storage_available() -> None:
+    """Fail fast while the storage breaker is open instead of queueing doomed uploads"""
+    try:
+        storage_breaker.check()
+    except CircuitOpen as e:
+        raise _storage_unavailable(e)
+
 @router.post("/image")
 async def upload_product_image(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_seller)
 ):
     """
-    Upload an image to Cloudinary and return the URL.
+    Upload an image to storage (Cloudinary by default) and return the URL,
+    plus card/thumbnail variant URLs when image processing is available.
     Only authenticated sellers can upload images.
     """
     # Validate file type
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
 
+    check_upload_size(file)
+    _check_storage_available()
+
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Upload to Cloudinary
-        url = upload_image(content)
-        
-        return {"url": url}
+        # The spooled upload is streamed, never read into memory here; resizing
+        # runs in the image process pool and uploads on the upload pool
+        return await store_image(file.file, file.content_type, current_user.id)
+    except InvalidImage:
+        raise HTTPException(status_code=400, detail="File is not a valid image")
+    except CircuitOpen as e:
+        raise _storage_unavailable(e)
+    except UploadTimeout as e:
+        raise HTTPException(status_code=504, detail=f"Image upload failed: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
 
 @router.post("/images")
 async def upload_multiple_images(
     files: list[UploadFile] = File(...),
+    background: bool = Query(False, description="Queue the upload and return a job id to poll"),
     current_user: User = Depends(get_current_seller)
 ):
     """
-    Upload multiple images to Cloudinary and return a list of URLs.
+    Upload multiple images to storage and return a list of URLs
+    (`images` also carries each one's card/thumbnail variant URLs).
+    Files are uploaded concurrently (UPLOAD_CONCURRENCY at a time).
+    With ?background=true the files are queued instead: the response is
+    202 with a job id, and GET /upload/jobs/{job_id} returns the URLs when done.
     Only authenticated sellers can upload images.
     """
-    urls = []
+    if len(files) > UPLOAD_MAX_FILES:
+        raise UploadTooLarge(f"At most {UPLOAD_MAX_FILES} files can be uploaded at once")
+
     errors = []
     
+    images = []
     for file in files:
         if not file.content_type.startswith("image/"):
             errors.append(f"File {file.filename} is not an image")
             continue
-            
         try:
-            content = await file.read()
-            url = upload_image(content)
-            urls.append(url)
-        except Exception as e:
-            errors.append(f"Failed to upload {file.filename}: {str(e)}")
+            check_upload_size(file)
+        except UploadTooLarge as e:
+            errors.append(e.detail)
+            continue
+        images.append(file)
+
+    if images:
+        _check_storage_available()
+
+    if background and images:
+        job_id = await upload_jobs.submit_job(images, current_user.id, errors)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"job_id": job_id, "status": "queued", "status_url": f"/upload/jobs/{job_id}"},
+        )
+
+    try:
+        result = await store_images(
+            [(file.filename, file.file, file.content_type) for file in images], current_user.id
+        )
+    except CircuitOpen as e:
+        # The breaker opened while this request was uploading
+        raise _storage_unavailable(e)
+    urls = result["urls"]
+    errors.extend(result["errors"])
             
     if not urls and errors:
         raise HTTPException(status_code=400, detail=f"All uploads failed: {', '.join(errors)}")
         
-    return {"urls": urls, "errors": errors if errors else None}
+    return {"urls": urls, "images": result["images"], "errors": errors if errors else None}
+
+@router.get("/jobs/{job_id}")
+def get_upload_job(
+    job_id: str,
+    current_user: User = Depends(get_current_seller),
+    db: Session = Depends(get_read_db, scope="function")
+):
+    """
+    Status of a background upload: queued, running, done or failed.
+    Once finished it carries the same urls/images/errors as the synchronous upload.
+    """
+    job = upload_jobs.get_job(db, job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
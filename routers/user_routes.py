@@ -1,17 +1,25 @@
 """
 User routes - Authentication, signup, login, profile management
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from models.User import User
 from schemas.User import UserCreate, UserUpdate, UserResponse, LoginResponse
 from dependencies import get_db
+from utils.rate_limit import login_throttle
 from auth import (
     get_password_hash, 
     verify_password, 
-    create_access_token, 
-    get_current_user
+    password_needs_rehash,
+    create_user_token, 
+    get_current_user,
+    revoke_user_tokens,
+    forget_token_version
 )
 
 userrouter = APIRouter(
@@ -20,31 +28,38 @@ userrouter = APIRouter(
 )
 
 
-@userrouter.post("/signup", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+# Unique indexes/constraints on users and the field each one guards: the
+# case-insensitive indexes, plus the column constraints as Postgres and SQLite name them
+_USER_UNIQUE_FIELDS = {
+    "ix_users_username_lower": "Username",
+    "ix_users_email_lower": "Email",
+    "users_username_key": "Username",
+    "users_email_key": "Email",
+    "users.username": "Username",
+    "users.email": "Email",
+}
+
+
+def _duplicate_user_error(error: IntegrityError, verb: str) -> Optional[HTTPException]:
     """
-    Create a new user account (buyer or seller)
-    Returns user info and JWT token
+    Map a unique-index violation on users to the matching 400 message; None if
+    the error is not one of them (the caller re-raises it)
     """
-    # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user.email).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    # Hash the password
-    hashed_password = get_password_hash(user.password)
-    
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint is None:
+        # No diagnostics (SQLite): the name is on the first line; later lines may echo the values
+        message = str(error.orig).partition("\n")[0]
+        constraint = next((name for name in _USER_UNIQUE_FIELDS if name in message), None)
+    field = _USER_UNIQUE_FIELDS.get(constraint)
+    if field is None:
+        return None
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{field} already {verb}"
+    )
+
+
+def _create_user(db: Session, user: UserCreate, hashed_password: str) -> dict:
     # Create new user
     new_user = User(
         username=user.username,
@@ -55,68 +70,116 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role
     )
     
+    # Username/email uniqueness is enforced by the unique indexes
     db.add(new_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        duplicate = _duplicate_user_error(e, "registered")
+        if duplicate is None:
+            raise
+        raise duplicate
     db.refresh(new_user)
-    
+    return _login_response(new_user)
+
+
+def _login_response(user: User) -> dict:
     # Generate JWT token
-    access_token = create_access_token(data={"user_id": new_user.id, "role": new_user.role})
+    access_token = create_user_token(user)
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
         "user": {
-            "id": new_user.id,
-            "username": new_user.username,
-            "email": new_user.email,
-            "phone": new_user.phone,
-            "address": new_user.address,
-            "role": new_user.role
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "phone": user.phone,
+            "address": user.address,
+            "role": user.role
         }
     }
 
 
-@userrouter.post("/login", response_model=LoginResponse)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+# signup and login are async so that waiting on the bcrypt pool holds no request
+# thread; their DB and throttle work runs in the threadpool through the helpers here
+
+@userrouter.post("/signup", response_model=LoginResponse, status_code=status.HTTP_201_CREATED)
+async def signup(user: UserCreate, db: Session = Depends(get_db, scope="function")):
     """
-    Login with username/email and password
-    Returns JWT token
+    Create a new user account (buyer or seller)
+    Returns user info and JWT token
     """
+    # Hash the password
+    hashed_password = await get_password_hash(user.password)
+    return await run_in_threadpool(_create_user, db, user, hashed_password)
+
+
+def _login_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect username/email or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _find_login_user(db: Session, username: str, client_ip: str) -> User:
+    # Throttle before touching the DB or bcrypt
+    login_throttle.check(username, client_ip)
+    
     # Find user by username OR email (flexible login)
+    # Case-insensitive; both branches are served by the lower() indexes
+    identifier = username.strip().lower()
     user = db.query(User).filter(
-        (User.username == form_data.username) | (User.email == form_data.username)
+        or_(func.lower(User.username) == identifier, func.lower(User.email) == identifier)
     ).first()
     
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username/email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        login_throttle.record_failure()
+        raise _login_failed()
+    
+    # The per-account limit also applies across the user's username and email
+    login_throttle.check_user(user.id)
+    return user
+
+
+def _complete_login(db: Session, user: User, username: str, new_hash: Optional[str]) -> dict:
+    login_throttle.record_success(user.id, username, user.username, user.email)
+    if new_hash is not None:
+        user.password = new_hash
+        db.commit()
+    return _login_response(user)
+
+
+@userrouter.post("/login", response_model=LoginResponse)
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db, scope="function")
+):
+    """
+    Login with username/email and password
+    Returns JWT token
+    """
+    client_ip = request.client.host if request.client else "unknown"
+    user = await run_in_threadpool(_find_login_user, db, form_data.username, client_ip)
     
     # Verify password
-    if not verify_password(form_data.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username/email or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if not await verify_password(form_data.password, user.password):
+        login_throttle.record_failure()
+        raise _login_failed()
     
-    # Generate JWT token
-    access_token = create_access_token(data={"user_id": user.id, "role": user.role})
+    # Upgrade hashes made with an older bcrypt cost while we have the plain password
+    # (best effort: a busy hashing pool must not fail an otherwise valid login)
+    new_hash = None
+    if password_needs_rehash(user.password):
+        try:
+            new_hash = await get_password_hash(form_data.password)
+        except HTTPException:
+            pass
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": {
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "phone": user.phone,
-            "address": user.address,
-            "role": user.role
-        }
-    }
+    return await run_in_threadpool(_complete_login, db, user, form_data.username, new_hash)
 
 
 @userrouter.get("/me", response_model=UserResponse)
@@ -140,30 +203,12 @@ def get_current_user_profile(current_user: User = Depends(get_current_user)):
 def update_current_user_profile(
     user_update: UserUpdate, 
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Update current user's profile
     Protected route - requires authentication
     """
-    # Check if new username is taken by another user
-    if user_update.username and user_update.username != current_user.username:
-        existing_user = db.query(User).filter(User.username == user_update.username).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Check if new email is taken by another user
-    if user_update.email and user_update.email != current_user.email:
-        existing_email = db.query(User).filter(User.email == user_update.email).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already taken"
-            )
-    
     # Update user fields
     if user_update.username:
         current_user.username = user_update.username
@@ -174,7 +219,15 @@ def update_current_user_profile(
     if user_update.address:
         current_user.address = user_update.address
     
-    db.commit()
+    # A username/email taken by another user trips the unique indexes
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        duplicate = _duplicate_user_error(e, "taken")
+        if duplicate is None:
+            raise
+        raise duplicate
     db.refresh(current_user)
     
     return {
@@ -191,19 +244,34 @@ def update_current_user_profile(
 @userrouter.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_current_user_account(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db, scope="function")
 ):
     """
     Delete current user's account
     Protected route - requires authentication
     """
+    user_id = current_user.id
     db.delete(current_user)
     db.commit()
+    forget_token_version(user_id)
+    return None
+
+
+@userrouter.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+def logout_all_sessions(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db, scope="function")
+):
+    """
+    Revoke every token issued to the current user (including this one)
+    Protected route - requires authentication
+    """
+    revoke_user_tokens(db, current_user)
     return None
 
 
 @userrouter.get("/{user_id}", response_model=UserResponse)
-def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
+def get_user_by_id(user_id: int, db: Session = Depends(get_db, scope="function")):
     """
     Get user by ID (public info only)
     """
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
@@ -9,10 +9,13 @@ class ProductCreate(BaseModel):
     description: Optional[str] = None
     price: float
     stock_quantity: int = 0
+    reorder_threshold: int = Field(0, ge=0)
     category_id: Optional[int] = None
     image_url: Optional[str] = None
     image_url_2: Optional[str] = None
     image_url_3: Optional[str] = None
+    card_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
 
 
 class ProductUpdate(BaseModel):
@@ -21,10 +24,13 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     price: Optional[float] = None
     stock_quantity: Optional[int] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0)
     category_id: Optional[int] = None
     image_url: Optional[str] = None
     image_url_2: Optional[str] = None
     image_url_3: Optional[str] = None
+    card_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
 
 
 class ProductResponse(BaseModel):
@@ -35,10 +41,13 @@ class ProductResponse(BaseModel):
     description: Optional[str]
     price: float
     stock_quantity: int
+    reorder_threshold: int = 0
     category_id: Optional[int]
     image_url: Optional[str]
     image_url_2: Optional[str]
     image_url_3: Optional[str]
+    card_image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     created_at: datetime
     
     class Config:
@@ -0,0 +1,138 @@
+"""
+Circuit breaker for calls to an outside service.
+
+- closed: calls go through; `failure_threshold` consecutive failures open it
+- open: calls fail immediately with CircuitOpen for `reset_timeout` seconds
+- half-open: after that, `half_open_max_calls` probe calls go through; a success
+  closes the breaker, a failure opens it again
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """The breaker is open; the call was not attempted"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_max_calls: int = 1,
+        is_failure: Optional[Callable[[Exception], bool]] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        # Errors the caller caused (bad input) should not open the breaker
+        self.is_failure = is_failure or (lambda e: True)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0,
+        }
+        self._last_error = None
+
+    def _retry_after(self, now: float) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - now)
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and self._retry_after(now) == 0:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def check(self) -> None:
+        """Raise CircuitOpen if calls are currently being refused (without taking a probe slot)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == OPEN or (state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls):
+                raise CircuitOpen(self.name, self._retry_after(now) or 1.0)
+
+    def _before_call(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == OPEN:
+                self._stats["rejected"] += 1
+                raise CircuitOpen(self.name, self._retry_after(now))
+            if state == HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._stats["rejected"] += 1
+                    raise CircuitOpen(self.name, 1.0)
+                self._half_open_calls += 1
+            self._stats["calls"] += 1
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            self._state = CLOSED
+
+    def _on_failure(self, error: Exception) -> None:
+        with self._lock:
+            self._stats["failures"] += 1
+            self._last_error = f"{type(error).__name__}: {error}"
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats["opened"] += 1
+                    print(f"Circuit breaker {self.name} opened after {self._failures} failure(s): {error}")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        """Run fn through the breaker"""
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self._on_failure(e)
+            else:
+                # The service answered; only the request was bad
+                self._on_success()
+            raise
+        self._on_success()
+        return result
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            stats = dict(self._stats)
+            stats.update(
+                name=self.name,
+                state=state,
+                consecutive_failures=self._failures,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                retry_after=round(self._retry_after(now), 1) if state == OPEN else 0.0,
+                last_error=self._last_error,
+            )
+        return stats
@@ -1,23 +1,77 @@
-import cloudinary
-import cloudinary.uploader
 import os
+import threading
 from dotenv import load_dotenv
+from utils.upload_limits import stream_size
 
 load_dotenv()
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("cloud_name"),
-    api_key=os.getenv("api_key"),
-    api_secret=os.getenv("api_secret")
-)
+# Streams larger than this are sent with Cloudinary's chunked upload, one chunk
+# in memory at a time (Cloudinary requires chunks of at least 5MB)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(5 * 1024 * 1024)))
 
-def upload_image(file_object):
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def get_uploader():
+    """
+    Import and configure the Cloudinary SDK on first use.
+    Keeps the SDK (and its HTTP stack) out of application startup.
+    """
+    global _configured
+    import cloudinary
+    import cloudinary.uploader
+
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                # Configure Cloudinary
+                cloudinary.config(
+                    cloud_name=os.getenv("cloud_name"),
+                    api_key=os.getenv("api_key"),
+                    api_secret=os.getenv("api_secret")
+                )
+                _configured = True
+    return cloudinary.uploader
+
+
+class _KeepOpen:
+    """File wrapper that survives upload_large's `with file:` so the caller can retry"""
+
+    def __init__(self, file_object):
+        self._file = file_object
+        self.name = getattr(file_object, "name", None)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def upload_image(file_object, **options):
     """
-    Uploads a file-like object to Cloudinary and returns the secure URL.
+    Uploads bytes or a file-like object to Cloudinary and returns the secure URL.
+    Large streams are uploaded in UPLOAD_CHUNK_SIZE chunks instead of being read whole.
+    Extra options (e.g. public_id) are passed to the SDK.
     """
     try:
-        response = cloudinary.uploader.upload(file_object)
+        uploader = get_uploader()
+        if hasattr(file_object, "read") and stream_size(file_object) > UPLOAD_CHUNK_SIZE:
+            response = uploader.upload_large(
+                _KeepOpen(file_object), resource_type="image", chunk_size=UPLOAD_CHUNK_SIZE, **options
+            )
+        else:
+            response = uploader.upload(file_object, **options)
         return response.get("secure_url")
     except Exception as e:
         print(f"Cloudinary upload error: {e}")
@@ -0,0 +1,64 @@
+"""
+Content-hash deduplication of uploads.
+
+Every stored upload is recorded in image_uploads under the SHA-256 of the bytes
+the seller sent. Uploading the same photo again returns the recorded URLs
+without processing or uploading anything.
+"""
+import hashlib
+import os
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from db.session import SessionLocal
+from models.ImageUpload import ImageUpload
+
+IMAGE_DEDUP = os.getenv("IMAGE_DEDUP", "true").lower() in ("1", "true", "yes")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_stream(file_object) -> str:
+    """SHA-256 of a file-like object, read in chunks; leaves it rewound"""
+    digest = hashlib.sha256()
+    file_object.seek(0)
+    for chunk in iter(lambda: file_object.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file_object.seek(0)
+    return digest.hexdigest()
+
+
+def _stored(image: ImageUpload) -> dict:
+    stored = {"url": image.url}
+    if image.card_url:
+        stored["card_url"] = image.card_url
+    if image.thumbnail_url:
+        stored["thumbnail_url"] = image.thumbnail_url
+    return stored
+
+
+def find_upload(content_hash: str) -> Optional[dict]:
+    """URLs of an earlier upload with the same content, or None"""
+    db = SessionLocal()
+    try:
+        image = db.get(ImageUpload, content_hash)
+        return _stored(image) if image is not None else None
+    finally:
+        db.close()
+
+
+def record_upload(content_hash: str, stored: dict, size_bytes: int, user_id: Optional[int]) -> None:
+    """Remember where an upload was stored; a concurrent duplicate keeps the first entry"""
+    db = SessionLocal()
+    try:
+        db.add(ImageUpload(
+            content_hash=content_hash,
+            url=stored["url"],
+            card_url=stored.get("card_url"),
+            thumbnail_url=stored.get("thumbnail_url"),
+            size_bytes=size_bytes,
+            uploaded_by=user_id,
+        ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,126 @@
+"""
+Image pipeline run before storage: decode, auto-orient, downsize and recompress
+an upload into web-sized variants.
+
+    full   longest side <= IMAGE_FULL_MAX_PX   product detail page
+    card   longest side <= IMAGE_CARD_PX       catalog listing
+    thumb  longest side <= IMAGE_THUMB_PX      cart, orders, small previews
+
+Decoding and resizing are CPU-bound, so they run in a process pool rather than
+on the event loop or the request threads. Pillow is optional: without it (or
+with IMAGE_PROCESSING=false) uploads are stored as sent.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+IMAGE_PROCESSING = os.getenv("IMAGE_PROCESSING", "true").lower() in ("1", "true", "yes")
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "webp").lower()  # webp or jpeg
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+IMAGE_FULL_MAX_PX = int(os.getenv("IMAGE_FULL_MAX_PX", "1600"))
+IMAGE_CARD_PX = int(os.getenv("IMAGE_CARD_PX", "600"))
+IMAGE_THUMB_PX = int(os.getenv("IMAGE_THUMB_PX", "200"))
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+VARIANTS = {
+    "full": IMAGE_FULL_MAX_PX,
+    "card": IMAGE_CARD_PX,
+    "thumb": IMAGE_THUMB_PX,
+}
+
+
+class InvalidImage(Exception):
+    """The upload could not be decoded as an image"""
+
+
+def pillow_available() -> bool:
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def enabled() -> bool:
+    return IMAGE_PROCESSING and pillow_available()
+
+
+def process_image(path: str, image_format: str = IMAGE_FORMAT, quality: int = IMAGE_QUALITY,
+                  variants: dict = VARIANTS) -> dict:
+    """
+    Decode the image at `path` and return {variant: encoded bytes}.
+    Runs in a worker process; arguments and result must be picklable.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as source:
+            # Apply the EXIF orientation so phone photos are not stored sideways
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e))
+
+    if image_format == "jpeg":
+        save_options = {"format": "JPEG", "quality": quality, "optimize": True, "progressive": True}
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+    else:
+        save_options = {"format": "WEBP", "quality": quality, "method": 4}
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    results = {}
+    # Largest first, each variant resized from the previous one
+    for name, max_px in sorted(variants.items(), key=lambda item: -item[1]):
+        image.thumbnail((max_px, max_px), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, **save_options)
+        results[name] = buffer.getvalue()
+    return results
+
+
+def content_type() -> str:
+    return "image/jpeg" if IMAGE_FORMAT == "jpeg" else "image/webp"
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Created on first use; forkserver avoids forking a process that already runs threads"""
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                _process_pool = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS, mp_context=context)
+    return _process_pool
+
+
+async def process_upload(file_object) -> Optional[dict]:
+    """
+    Produce the variants of an uploaded image, or None when processing is off.
+    The upload is copied to a temp file in chunks so the worker can read it
+    without the whole original passing through this process's memory.
+    """
+    if not enabled():
+        return None
+    loop = asyncio.get_running_loop()
+    # Closed before the worker opens it by name: Windows will not open a file that is still open here
+    spool = tempfile.NamedTemporaryFile(suffix=".upload", delete=False)
+    try:
+        with spool:
+            file_object.seek(0)
+            await loop.run_in_executor(None, shutil.copyfileobj, file_object, spool)
+        return await loop.run_in_executor(get_process_pool(), process_image, spool.name)
+    finally:
+        os.unlink(spool.name)
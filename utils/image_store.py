@@ -0,0 +1,84 @@
+"""
+Storing an uploaded image: dedup lookup, resizing into variants, upload.
+Shared by the upload routes and the background upload jobs.
+"""
+from fastapi.concurrency import run_in_threadpool
+from utils import image_index
+from utils.circuit_breaker import CircuitOpen
+from utils.image_processing import InvalidImage, process_upload, content_type as variant_content_type
+from utils.upload_pool import UPLOAD_CONCURRENCY, upload_image_async, upload_images_concurrently
+from utils.upload_limits import stream_size
+
+
+async def store_image(file_object, content_type: str, user_id: int,
+                      variant_concurrency: int = UPLOAD_CONCURRENCY) -> dict:
+    """
+    Resize the upload into its full/card/thumb variants and upload those,
+    variant_concurrency at a time; without image processing the original is
+    uploaded as sent. A file whose content was uploaded before returns the earlier URLs.
+    """
+    content_hash = None
+    if image_index.IMAGE_DEDUP:
+        content_hash = await run_in_threadpool(image_index.hash_stream, file_object)
+        existing = await run_in_threadpool(image_index.find_upload, content_hash)
+        if existing is not None:
+            return existing
+
+    stored = await _upload_variants(file_object, content_type, variant_concurrency)
+    if content_hash is not None:
+        await run_in_threadpool(
+            image_index.record_upload, content_hash, stored, stream_size(file_object), user_id
+        )
+    return stored
+
+
+async def _upload_variants(file_object, content_type: str, concurrency: int) -> dict:
+    variants = await process_upload(file_object)
+    if variants is None:
+        file_object.seek(0)
+        return {"url": await upload_image_async(file_object, content_type)}
+
+    def upload_job(data):
+        return lambda: upload_image_async(data, variant_content_type())
+
+    names = list(variants)
+    results = await upload_images_concurrently([upload_job(variants[name]) for name in names], concurrency)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    urls = dict(zip(names, results))
+    return {"url": urls["full"], "card_url": urls["card"], "thumbnail_url": urls["thumb"]}
+
+
+async def store_images(files, user_id: int) -> dict:
+    """
+    Store (filename, file_object, content_type) tuples, UPLOAD_CONCURRENCY at a time.
+    Each file uploads its variants one after another, so the request never has
+    more than UPLOAD_CONCURRENCY uploads in flight.
+    Returns {"urls", "images", "errors"} with one error message per failed file.
+    Raises CircuitOpen if nothing was stored and the storage breaker turned
+    files away, so callers can answer 503 instead of "all uploads failed".
+    """
+    def upload_job(file_object, content_type):
+        return lambda: store_image(file_object, content_type, user_id, variant_concurrency=1)
+
+    urls = []
+    stored = []
+    errors = []
+    results = await upload_images_concurrently(
+        [upload_job(file_object, content_type) for _, file_object, content_type in files]
+    )
+    circuit_open = None
+    for (filename, _, _), result in zip(files, results):
+        if isinstance(result, CircuitOpen):
+            circuit_open = result
+        if isinstance(result, InvalidImage):
+            errors.append(f"File {filename} is not a valid image")
+        elif isinstance(result, Exception):
+            errors.append(f"Failed to upload {filename}: {str(result)}")
+        else:
+            urls.append(result["url"])
+            stored.append(result)
+    if circuit_open is not None and not stored:
+        raise circuit_open
+    return {"urls": urls, "images": stored, "errors": errors}
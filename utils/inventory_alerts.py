@@ -0,0 +1,59 @@
+"""
+Low-stock and out-of-stock alerts.
+
+A product is low on stock when stock_quantity <= reorder_threshold (per
+product; the default 0 means "alert when it runs out"). Routes that change a
+product's stock or threshold call check_stock() with the values from before
+the change. If that change takes the product across the threshold (or down to
+zero), an inventory_alerts row is queued in the same transaction (one INSERT
+for all of a request's alerts, via queue_alerts()), so no request ever scans
+the seller's catalog. The current list of low products is read through
+the partial index ix_products_low_stock.
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import insert
+from models.InventoryAlert import InventoryAlert
+
+LOW_STOCK = "low_stock"
+OUT_OF_STOCK = "out_of_stock"
+
+
+def alert_kind(old_stock: Optional[int], old_threshold: Optional[int],
+               new_stock: Optional[int], new_threshold: Optional[int]) -> Optional[str]:
+    """The alert a stock/threshold change should raise, if any"""
+    old_stock, new_stock = old_stock or 0, new_stock or 0
+    old_threshold, new_threshold = old_threshold or 0, new_threshold or 0
+    if new_stock <= 0 < old_stock:
+        return OUT_OF_STOCK
+    if new_stock <= new_threshold and old_stock > old_threshold and new_stock > 0:
+        return LOW_STOCK
+    return None
+
+
+def check_stock(product, old_stock: Optional[int], old_threshold: Optional[int] = None) -> Optional[dict]:
+    """
+    The inventory_alerts row to queue if product (already updated, not yet
+    committed) crossed its threshold, else None; old_threshold defaults to the
+    product's current threshold
+    """
+    if old_threshold is None:
+        old_threshold = product.reorder_threshold
+    kind = alert_kind(old_stock, old_threshold, product.stock_quantity, product.reorder_threshold)
+    if kind is None:
+        return None
+    return {
+        "seller_id": product.seller_id,
+        "product_id": product.id,
+        "kind": kind,
+        "stock_quantity": product.stock_quantity or 0,
+        "reorder_threshold": product.reorder_threshold or 0,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def queue_alerts(db, alerts: Iterable[Optional[dict]]) -> None:
+    """Insert the alerts returned by check_stock() in one statement (Nones are skipped)"""
+    rows = [alert for alert in alerts if alert is not None]
+    if rows:
+        db.execute(insert(InventoryAlert), rows)
@@ -0,0 +1,99 @@
+"""
+Streaming CSV export of a seller's orders (GET /seller/orders/export).
+
+Rows are read in order-date order through a server-side cursor, ORDER_EXPORT_BATCH_ROWS
+at a time, and each batch is written out as CSV before the next is fetched, so
+memory stays constant however many orders the seller has. The export uses its
+own read session, because the body is sent after the request's session has
+been closed.
+"""
+import csv
+import io
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, Optional
+from sqlalchemy import select
+from models.Order import Order
+from models.OrderItem import OrderItem
+from models.Product import Product
+from models.User import User
+
+ORDER_EXPORT_BATCH_ROWS = int(os.getenv("ORDER_EXPORT_BATCH_ROWS", "1000"))
+
+COLUMNS = [
+    "order_id", "order_date", "status",
+    "customer_name", "customer_phone", "customer_address",
+    "product_id", "product_name", "quantity", "unit_price", "line_total",
+]
+
+# Spreadsheet apps run cells starting with these as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return str(value)
+
+
+def export_query(seller_id: int, start: Optional[date] = None, end: Optional[date] = None):
+    """One row per order line of the seller's products, oldest order first; start/end are inclusive days"""
+    query = select(
+        Order.id,
+        Order.order_date,
+        Order.status,
+        User.username,
+        User.phone,
+        User.address,
+        OrderItem.product_id,
+        Product.name,
+        OrderItem.quantity,
+        OrderItem.price,
+    )\
+        .select_from(OrderItem)\
+        .join(Product, Product.id == OrderItem.product_id)\
+        .join(Order, Order.id == OrderItem.order_id)\
+        .outerjoin(User, User.id == Order.user_id)\
+        .where(Product.seller_id == seller_id)
+    if start is not None:
+        query = query.where(Order.order_date >= datetime.combine(start, time.min))
+    if end is not None:
+        query = query.where(Order.order_date < datetime.combine(end + timedelta(days=1), time.min))
+    return query.order_by(Order.order_date, Order.id, OrderItem.id)
+
+
+def stream_orders_csv(db, seller_id: int, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[bytes]:
+    """
+    Yield the export as UTF-8 CSV chunks, one per batch of rows; closes db when
+    done (or when the client goes away and the generator is closed)
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    try:
+        # BOM so Excel opens non-ASCII names correctly
+        buffer.write("\ufeff")
+        writer.writerow(COLUMNS)
+        yield buffer.getvalue().encode("utf-8")
+
+        result = db.execute(
+            export_query(seller_id, start, end),
+            execution_options={"yield_per": ORDER_EXPORT_BATCH_ROWS}
+        )
+        for rows in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in rows:
+                quantity, price = row.quantity, row.price
+                writer.writerow([
+                    _cell(row.id), _cell(row.order_date), _cell(row.status),
+                    _cell(row.username), _cell(row.phone), _cell(row.address),
+                    _cell(row.product_id), _cell(row.name), _cell(quantity), _cell(price),
+                    _cell(price * quantity if price is not None and quantity is not None else None),
+                ])
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        db.close()
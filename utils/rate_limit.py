@@ -0,0 +1,209 @@
+"""
+Sliding-window rate limiting, used to throttle login attempts before any
+DB lookup or bcrypt work is done.
+
+The limiter keeps its hit log in a backend. The default backend is in-process;
+a shared one (e.g. Redis) can be plugged in with `login_throttle.set_backend(...)`
+so that several uvicorn workers enforce one limit.
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional
+from fastapi import HTTPException, status
+
+
+class RateLimitBackend(ABC):
+    """Storage for sliding-window hit logs"""
+
+    @abstractmethod
+    def hit(self, key: str, window: float) -> int:
+        """Record a hit for key and return the number of hits within the window"""
+
+    @abstractmethod
+    def acquire(self, key: str, window: float, limit: int) -> bool:
+        """
+        Atomically record a hit for key if it has fewer than `limit` hits within
+        the window; False (and nothing recorded) otherwise
+        """
+
+    @abstractmethod
+    def count(self, key: str, window: float) -> int:
+        """Return the number of hits for key within the window without recording one"""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Forget all hits for key"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process hit log: timestamps kept in a deque per key"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._hits: dict = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, hits: deque, now: float, window: float) -> None:
+        while hits and now - hits[0] >= window:
+            hits.popleft()
+
+    def _evict_stale(self, now: float, window: float) -> None:
+        stale = [k for k, hits in self._hits.items() if not hits or now - hits[-1] >= window]
+        for k in stale:
+            del self._hits[k]
+        # Still full of live keys: drop the oldest half rather than grow without bound
+        if len(self._hits) >= self.max_keys:
+            for k in list(self._hits)[: len(self._hits) // 2]:
+                del self._hits[k]
+
+    def _live_hits(self, key: str, now: float, window: float) -> deque:
+        """The key's pruned hit log, created if missing; call with the lock held"""
+        hits = self._hits.get(key)
+        if hits is None:
+            if len(self._hits) >= self.max_keys:
+                self._evict_stale(now, window)
+            hits = self._hits[key] = deque()
+        self._prune(hits, now, window)
+        return hits
+
+    def hit(self, key: str, window: float) -> int:
+        now = time.monotonic()
+        with self._lock:
+            hits = self._live_hits(key, now, window)
+            hits.append(now)
+            return len(hits)
+
+    def acquire(self, key: str, window: float, limit: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            hits = self._live_hits(key, now, window)
+            if len(hits) >= limit:
+                return False
+            hits.append(now)
+            return True
+
+    def count(self, key: str, window: float) -> int:
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._prune(hits, now, window)
+            return len(hits)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class LoginThrottle:
+    """
+    Login limiter keyed by account and by client IP.
+    - account: attempts per account within the window, counted under the
+      normalized identifier before the lookup and under the user id once it is
+      known, so "bob" and "bob@x.com" share one limit
+    - ip: all attempts per client IP within the window
+
+    Every attempt reserves its slot atomically before any lookup or bcrypt
+    work, so a concurrent burst cannot slip past the limit; a successful login
+    releases the account's slots.
+    """
+
+    def __init__(
+        self,
+        account_limit: int,
+        account_window: float,
+        ip_limit: int,
+        ip_window: float,
+        backend: Optional[RateLimitBackend] = None
+    ):
+        self.account_limit = account_limit
+        self.account_window = account_window
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self.backend = backend or InMemoryRateLimitBackend()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "attempts": 0,
+            "throttled_by_account": 0,
+            "throttled_by_ip": 0,
+            "failed_logins": 0,
+        }
+
+    def set_backend(self, backend: RateLimitBackend) -> None:
+        """Swap the hit-log storage, e.g. for one shared across workers"""
+        self.backend = backend
+
+    def _bump(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    @staticmethod
+    def _account_key(account: str) -> str:
+        return f"login:account:{account.strip().lower()}"
+
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"login:user:{user_id}"
+
+    @staticmethod
+    def _ip_key(client_ip: str) -> str:
+        return f"login:ip:{client_ip}"
+
+    def _throttled_by_account(self) -> HTTPException:
+        self._bump("throttled_by_account")
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts for this account, please try again later",
+            headers={"Retry-After": str(int(self.account_window))},
+        )
+
+    def check(self, account: str, client_ip: str) -> None:
+        """Reserve an attempt for the IP and the identifier as typed, or raise 429"""
+        self._bump("attempts")
+
+        if not self.backend.acquire(self._ip_key(client_ip), self.ip_window, self.ip_limit):
+            self._bump("throttled_by_ip")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, please try again later",
+                headers={"Retry-After": str(int(self.ip_window))},
+            )
+
+        if not self.backend.acquire(self._account_key(account), self.account_window, self.account_limit):
+            raise self._throttled_by_account()
+
+    def check_user(self, user_id: int) -> None:
+        """Reserve an attempt against the resolved account (whichever identifier was used), or raise 429"""
+        if not self.backend.acquire(self._user_key(user_id), self.account_window, self.account_limit):
+            raise self._throttled_by_account()
+
+    def record_failure(self) -> None:
+        """Count a failed login (its slots were already reserved by check/check_user)"""
+        self._bump("failed_logins")
+
+    def record_success(self, user_id: int, *identifiers: str) -> None:
+        """Release the account's slots under its user id and every identifier it can log in with"""
+        self.backend.reset(self._user_key(user_id))
+        for identifier in identifiers:
+            if identifier:
+                self.backend.reset(self._account_key(identifier))
+
+    def stats(self) -> dict:
+        """Counters since process start; every throttled attempt is a skipped lookup + bcrypt check"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["hash_checks_avoided"] = stats["throttled_by_account"] + stats["throttled_by_ip"]
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+
+login_throttle = LoginThrottle(
+    account_limit=int(os.getenv("LOGIN_MAX_FAILURES_PER_ACCOUNT", "5")),
+    account_window=float(os.getenv("LOGIN_ACCOUNT_WINDOW_SECONDS", "300")),
+    ip_limit=int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "30")),
+    ip_window=float(os.getenv("LOGIN_IP_WINDOW_SECONDS", "60")),
+)
@@ -0,0 +1,216 @@
+"""
+seller_daily_sales rollup: units, revenue and order count per seller, product
+and UTC day, so the seller analytics endpoints never scan order_items.
+
+Checkout adds an order's lines and cancelling subtracts them, inside the same
+transaction as the order change. The write is an upsert that increments the
+row, so concurrent checkouts for the same product and day do not lose updates.
+
+rebuild() recomputes the table (or every day from a given date on) from the
+orders in one INSERT ... SELECT (migration 0008 ran the same query as its
+backfill); re-run it to repair drift:
+
+    python -m utils.sales_rollup [--since YYYY-MM-DD]
+"""
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import delete, distinct, func, insert, select, text, update
+from models.Order import Order
+from models.OrderItem import OrderItem
+from models.Product import Product
+from models.SellerDailySales import SellerDailySales
+
+CANCELLED = "cancelled"
+GRANULARITIES = ("day", "week", "month")
+# Longest date range one analytics request may cover
+SALES_ANALYTICS_MAX_DAYS = int(os.getenv("SALES_ANALYTICS_MAX_DAYS", "731"))
+SALES_ANALYTICS_DEFAULT_DAYS = 30
+
+# (seller_id, product_id, quantity, unit price) for each line of an order
+OrderLine = Tuple[Optional[int], int, int, object]
+
+
+def _dialect_name(db) -> str:
+    """Works for both a Session and a Connection"""
+    bind = db if hasattr(db, "dialect") else db.get_bind()
+    return bind.dialect.name
+
+
+def _rollup_rows(order_date: Optional[datetime], lines: Iterable[OrderLine], sign: int) -> list:
+    totals = {}
+    for seller_id, product_id, quantity, price in lines:
+        if seller_id is None:
+            continue
+        units, revenue = totals.get((seller_id, product_id), (0, Decimal(0)))
+        totals[(seller_id, product_id)] = (units + quantity, revenue + Decimal(str(price)) * quantity)
+    day = (order_date or datetime.utcnow()).date()
+    return [
+        {
+            "seller_id": seller_id,
+            "day": day,
+            "product_id": product_id,
+            "units": sign * units,
+            "revenue": sign * revenue,
+            "order_count": sign,
+        }
+        for (seller_id, product_id), (units, revenue) in totals.items()
+    ]
+
+
+def _upsert(db, rows: list) -> None:
+    table = SellerDailySales.__table__
+    dialect = _dialect_name(db)
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.seller_id, table.c.day, table.c.product_id],
+            set_={
+                "units": table.c.units + stmt.excluded.units,
+                "revenue": table.c.revenue + stmt.excluded.revenue,
+                "order_count": table.c.order_count + stmt.excluded.order_count,
+            },
+        )
+        db.execute(stmt, rows)
+        return
+    # Other databases: update, then insert the rows that did not exist yet
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(
+                table.c.seller_id == row["seller_id"],
+                table.c.day == row["day"],
+                table.c.product_id == row["product_id"],
+            )
+            .values(
+                units=table.c.units + row["units"],
+                revenue=table.c.revenue + row["revenue"],
+                order_count=table.c.order_count + row["order_count"],
+            )
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table), [row])
+
+
+def record_order(db, order_date: Optional[datetime], lines: Iterable[OrderLine]) -> None:
+    """Add a placed order's lines to the rollup (call before committing the order)"""
+    rows = _rollup_rows(order_date, lines, 1)
+    if rows:
+        _upsert(db, rows)
+
+
+def remove_order(db, order_date: Optional[datetime], lines: Iterable[OrderLine]) -> None:
+    """Take a cancelled order's lines back out of the rollup"""
+    rows = _rollup_rows(order_date, lines, -1)
+    if rows:
+        _upsert(db, rows)
+
+
+def order_lines(db, order_id: int) -> list:
+    """The rollup lines of an order already in the database"""
+    return db.execute(
+        select(Product.seller_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id == order_id)
+    ).all()
+
+
+def rebuild(conn, since: Optional[date] = None) -> int:
+    """
+    Recompute the rollup from orders and order items, for every day or from
+    `since` on; returns the number of rows written. Run it inside a transaction.
+    """
+    if _dialect_name(conn) == "postgresql":
+        # Checkouts and cancels wait until the rebuild commits, then apply their deltas on top
+        conn.execute(text(f"LOCK TABLE {SellerDailySales.__tablename__} IN EXCLUSIVE MODE"))
+
+    day = func.date(Order.order_date)
+    source = select(
+        Product.seller_id,
+        day,
+        OrderItem.product_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.price * OrderItem.quantity),
+        func.count(distinct(OrderItem.order_id)),
+    )\
+        .select_from(OrderItem)\
+        .join(Product, Product.id == OrderItem.product_id)\
+        .join(Order, Order.id == OrderItem.order_id)\
+        .where(Order.status.is_distinct_from(CANCELLED), Product.seller_id.is_not(None))\
+        .group_by(Product.seller_id, day, OrderItem.product_id)
+    clear = delete(SellerDailySales)
+    if since is not None:
+        source = source.where(Order.order_date >= datetime.combine(since, time.min))
+        clear = clear.where(SellerDailySales.day >= since)
+
+    conn.execute(clear)
+    result = conn.execute(
+        insert(SellerDailySales).from_select(
+            ["seller_id", "day", "product_id", "units", "revenue", "order_count"],
+            source,
+        )
+    )
+    return result.rowcount
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the day/week (Monday)/month bucket containing `day`"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_series(daily_rows: Iterable, start: date, end: date, granularity: str) -> list:
+    """
+    Fold (day, units, revenue, order_lines) rows into one point per period
+    between start and end, including periods with no sales
+    """
+    points = {}
+    period = period_start(start, granularity)
+    while period <= end:
+        points[period] = {"period": period, "units": 0, "revenue": Decimal(0), "order_lines": 0}
+        period = next_period(period, granularity)
+    for day, units, revenue, order_lines in daily_rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        point = points[period_start(day, granularity)]
+        point["units"] += units or 0
+        point["revenue"] += Decimal(str(revenue or 0))
+        point["order_lines"] += order_lines or 0
+    for point in points.values():
+        point["revenue"] = float(point["revenue"])
+    return list(points.values())
+
+
+def main():
+    import argparse
+    from db.session import get_engine
+
+    parser = argparse.ArgumentParser(description="Rebuild the seller_daily_sales rollup")
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="only rebuild days from this date (YYYY-MM-DD) on")
+    args = parser.parse_args()
+
+    with get_engine().begin() as conn:
+        rows = rebuild(conn, args.since)
+    print(f"Rebuilt seller_daily_sales{f' from {args.since}' if args.since else ''}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
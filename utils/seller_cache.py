@@ -0,0 +1,71 @@
+"""
+Per-seller cache of dashboard stats.
+
+Entries are dropped when the seller's products or orders change (product
+create/delete, order placed, cancelled or status changed) and expire after
+SELLER_STATS_CACHE_TTL seconds regardless, which bounds staleness from changes
+made through other uvicorn workers.
+"""
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+SELLER_STATS_CACHE_TTL = float(os.getenv("SELLER_STATS_CACHE_TTL", "60"))
+SELLER_STATS_CACHE_SIZE = int(os.getenv("SELLER_STATS_CACHE_SIZE", "10000"))
+
+
+class SellerStatsCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: dict = {}  # seller_id -> (stats, stored_at)
+        # Bumped on every invalidation; a result computed before it is not stored
+        self._generations: dict = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, seller_id: int, compute: Callable[[], dict]) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(seller_id)
+            if cached is not None and now - cached[1] < self.ttl:
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(seller_id, 0))
+
+        stats = compute()
+
+        with self._lock:
+            if (self._epoch, self._generations.get(seller_id, 0)) == generation:
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+                self._entries[seller_id] = (stats, now)
+        return stats
+
+    def invalidate(self, seller_ids: Iterable[Optional[int]]) -> None:
+        with self._lock:
+            for seller_id in seller_ids:
+                if seller_id is None:
+                    continue
+                self._entries.pop(seller_id, None)
+                self._generations[seller_id] = self._generations.get(seller_id, 0) + 1
+            if len(self._generations) >= self.max_size:
+                # Reset the counters; the new epoch keeps in-flight results from being stored
+                self._generations = {}
+                self._epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "ttl": self.ttl}
+
+
+dashboard_cache = SellerStatsCache(SELLER_STATS_CACHE_TTL, SELLER_STATS_CACHE_SIZE)
+
+
+def invalidate_seller_stats(*seller_ids: Optional[int]) -> None:
+    """Forget cached dashboard stats for these sellers"""
+    dashboard_cache.invalidate(seller_ids)
@@ -0,0 +1,189 @@
+"""
+Image storage backends.
+
+    put(file_object, key, content_type) -> public URL
+    get(key)                            -> readable binary file object
+    url(key)                            -> public URL
+    delete(key)
+
+STORAGE_BACKEND picks the implementation:
+- "cloudinary" (default): the Cloudinary account from the cloud_name/api_key/api_secret env
+- "local": files under STORAGE_LOCAL_ROOT, served by routers/media_routes.py at
+  STORAGE_LOCAL_URL with long-lived cache headers (keys are content-unique, so
+  the files never change)
+"""
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional
+from utils.circuit_breaker import CircuitBreaker
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary").lower()
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "media")
+# Prefix of local file URLs; point it at a CDN in front of /media to offload serving
+STORAGE_LOCAL_URL = os.getenv("STORAGE_LOCAL_URL", "/media").rstrip("/")
+
+# Socket timeout for each call to the provider, so a slow provider frees the upload thread
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", "20"))
+# Consecutive provider failures that open the breaker, and how long it stays open
+STORAGE_BREAKER_FAILURES = int(os.getenv("STORAGE_BREAKER_FAILURES", "5"))
+STORAGE_BREAKER_RESET_SECONDS = float(os.getenv("STORAGE_BREAKER_RESET_SECONDS", "30"))
+
+# Cloudinary errors caused by the request itself; they neither trip the breaker nor get retried
+PERMANENT_ERRORS = {"BadRequest", "AuthorizationRequired", "NotAllowed", "NotFound", "AlreadyExists"}
+
+
+def is_provider_failure(error: Exception) -> bool:
+    return type(error).__name__ not in PERMANENT_ERRORS
+
+
+class StorageBackend(ABC):
+    """Where uploaded images live"""
+
+    @abstractmethod
+    def put(self, file_object, key: str, content_type: Optional[str] = None) -> str:
+        """Store bytes or a file-like object under key and return its public URL"""
+
+    @abstractmethod
+    def get(self, key: str):
+        """Open the stored object for reading"""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL of a stored object"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a stored object; missing keys are ignored"""
+
+
+class CloudinaryStorage(StorageBackend):
+    """Cloudinary, with the key (minus extension) as the public id"""
+
+    @staticmethod
+    def _public_id(key: str) -> str:
+        return os.path.splitext(key)[0]
+
+    def put(self, file_object, key, content_type=None):
+        from utils.cloudinary_utils import upload_image
+        return upload_image(file_object, public_id=self._public_id(key), timeout=STORAGE_TIMEOUT_SECONDS)
+
+    def get(self, key):
+        from urllib.request import urlopen
+        return urlopen(self.url(key), timeout=STORAGE_TIMEOUT_SECONDS)
+
+    def url(self, key):
+        from utils.cloudinary_utils import get_uploader
+        get_uploader()  # configures the SDK
+        import cloudinary.utils
+        return cloudinary.utils.cloudinary_url(self._public_id(key), secure=True)[0]
+
+    def delete(self, key):
+        from utils.cloudinary_utils import get_uploader
+        get_uploader().destroy(self._public_id(key), invalidate=True, timeout=STORAGE_TIMEOUT_SECONDS)
+
+
+class LocalStorage(StorageBackend):
+    """Files on local disk (or a mounted volume)"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.realpath(root)
+        self.base_url = base_url
+
+    def path(self, key: str) -> str:
+        """Absolute path for key; refuses keys that escape the storage root"""
+        path = os.path.realpath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root or path == self.root:
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return path
+
+    def put(self, file_object, key, content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if isinstance(file_object, (bytes, bytearray)):
+                    out.write(file_object)
+                else:
+                    shutil.copyfileobj(file_object, out, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self.url(key)
+
+    def get(self, key):
+        return open(self.path(key), "rb")
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def delete(self, key):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class BreakerStorage(StorageBackend):
+    """
+    Routes provider calls through a circuit breaker: after STORAGE_BREAKER_FAILURES
+    failures in a row, calls fail fast with CircuitOpen instead of tying up
+    upload threads on a provider that is down.
+    """
+
+    def __init__(self, backend: StorageBackend, breaker: CircuitBreaker):
+        self.backend = backend
+        self.breaker = breaker
+
+    def put(self, file_object, key, content_type=None):
+        return self.breaker.call(self.backend.put, file_object, key, content_type)
+
+    def get(self, key):
+        return self.breaker.call(self.backend.get, key)
+
+    def url(self, key):
+        return self.backend.url(key)
+
+    def delete(self, key):
+        return self.breaker.call(self.backend.delete, key)
+
+
+storage_breaker = CircuitBreaker(
+    "storage",
+    failure_threshold=STORAGE_BREAKER_FAILURES,
+    reset_timeout=STORAGE_BREAKER_RESET_SECONDS,
+    # One image is stored as three variants at once; let a whole image through as the probe
+    half_open_max_calls=3,
+    is_failure=is_provider_failure,
+)
+
+
+def new_key(extension: str = "", prefix: str = "products") -> str:
+    """Unique storage key, e.g. products/3f/3f9c...e1.webp"""
+    name = uuid.uuid4().hex
+    return f"{prefix}/{name[:2]}/{name}{extension}"
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == "local":
+                    backend = LocalStorage(STORAGE_LOCAL_ROOT, STORAGE_LOCAL_URL)
+                elif STORAGE_BACKEND == "cloudinary":
+                    backend = CloudinaryStorage()
+                else:
+                    raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}")
+                _storage = BreakerStorage(backend, storage_breaker)
+    return _storage
@@ -0,0 +1,176 @@
+"""
+Background upload jobs.
+
+POST /upload/images?background=true copies the request's files to
+UPLOAD_JOB_DIR, records a queued job in upload_jobs and returns its id at once.
+UPLOAD_JOB_WORKERS jobs at a time are then processed on a dedicated event-loop
+thread (resizing and uploads still go to the image and upload pools), and the
+result is written to the job row, where GET /upload/jobs/{id} reads it from
+any uvicorn worker.
+
+The copied files only exist in the process that accepted the job; a job whose
+process died before finishing is reported as failed once it is older than
+UPLOAD_JOB_TIMEOUT_SECONDS.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from db.session import SessionLocal
+from models.UploadJob import UploadJob
+from utils.image_store import store_images
+
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+UPLOAD_JOB_QUEUE = int(os.getenv("UPLOAD_JOB_QUEUE", "100"))
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR") or os.path.join(tempfile.gettempdir(), "upload-jobs")
+UPLOAD_JOB_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_JOB_TIMEOUT_SECONDS", "600"))
+
+
+class UploadJobRunner:
+    """Runs job coroutines on its own event loop thread, `workers` at a time"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._loop = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        if self._loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="upload-jobs", daemon=True).start()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._loop = loop
+        return self._loop
+
+    def submit(self, job_fn, *args) -> None:
+        """Queue job_fn(*args); 503 when UPLOAD_JOB_QUEUE jobs are already waiting or running"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many uploads in progress, please retry",
+                    headers={"Retry-After": "5"},
+                )
+            self.pending += 1
+            loop = self._get_loop()
+        asyncio.run_coroutine_threadsafe(self._run(job_fn, *args), loop)
+
+    async def _run(self, job_fn, *args):
+        try:
+            async with self._slots:
+                await job_fn(*args)
+        except Exception as e:
+            print(f"Upload job failed: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+
+runner = UploadJobRunner(UPLOAD_JOB_WORKERS, UPLOAD_JOB_QUEUE)
+
+
+def _save_files(job_dir: str, files) -> list:
+    """Copy the request's spooled files to job_dir; returns (filename, path, content_type)"""
+    os.makedirs(job_dir, exist_ok=True)
+    saved = []
+    for index, (filename, file_object, content_type) in enumerate(files):
+        path = os.path.join(job_dir, str(index))
+        file_object.seek(0)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file_object, out, 1024 * 1024)
+        saved.append((filename, path, content_type))
+    return saved
+
+
+def _create_job(job_id: str, user_id: int, file_count: int) -> None:
+    db = SessionLocal()
+    try:
+        db.add(UploadJob(id=job_id, user_id=user_id, status="queued", file_count=file_count))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _update_job(job_id: str, job_status: str, result: Optional[dict] = None) -> None:
+    db = SessionLocal()
+    try:
+        job = db.get(UploadJob, job_id)
+        if job is None:
+            return
+        job.status = job_status
+        if result is not None:
+            job.result = result
+            job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _process_job(job_id: str, job_dir: str, saved: list, user_id: int, errors: list) -> None:
+    await run_in_threadpool(_update_job, job_id, "running")
+    handles = []
+    try:
+        handles = [(filename, open(path, "rb"), content_type) for filename, path, content_type in saved]
+        result = await store_images(handles, user_id)
+        result["errors"] = errors + result["errors"]
+    except Exception as e:
+        result = {"urls": [], "images": [], "errors": errors + [f"Upload failed: {str(e)}"]}
+    finally:
+        for _, handle, _ in handles:
+            handle.close()
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+    job_status = "done" if result["urls"] else "failed"
+    result["errors"] = result["errors"] or None
+    await run_in_threadpool(_update_job, job_id, job_status, result)
+
+
+async def submit_job(files: list[UploadFile], user_id: int, errors: list) -> str:
+    """Persist the files and queue them for upload; returns the job id"""
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(UPLOAD_JOB_DIR, job_id)
+    created = False
+    try:
+        saved = await run_in_threadpool(
+            _save_files, job_dir, [(file.filename, file.file, file.content_type) for file in files]
+        )
+        await run_in_threadpool(_create_job, job_id, user_id, len(files))
+        created = True
+        runner.submit(_process_job, job_id, job_dir, saved, user_id, list(errors))
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        if created:
+            result = {"urls": [], "images": [], "errors": ["Upload job could not be queued"]}
+            await run_in_threadpool(_update_job, job_id, "failed", result)
+        raise
+    return job_id
+
+
+def get_job(db, job_id: str, user_id: int) -> Optional[dict]:
+    """The caller's job as returned by GET /upload/jobs/{id}, or None"""
+    job = db.query(UploadJob).filter(UploadJob.id == job_id, UploadJob.user_id == user_id).first()
+    if job is None:
+        return None
+    job_status = job.status
+    result = job.result
+    if job_status in ("queued", "running") and job.created_at is not None and \
+            datetime.utcnow() - job.created_at > timedelta(seconds=UPLOAD_JOB_TIMEOUT_SECONDS):
+        job_status = "failed"
+        result = {"urls": [], "images": [], "errors": ["Upload job did not finish in time"]}
+    return {
+        "job_id": job.id,
+        "status": job_status,
+        "file_count": job.file_count,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        **(result or {}),
+    }
@@ -0,0 +1,111 @@
+"""
+Upload size limits.
+
+Multipart parsing already spools each file part to a SpooledTemporaryFile
+(kept in memory up to 1MB, then on disk), so the routes hand that file on to
+the uploader instead of reading it into memory. What is left is making sure
+an oversized request is refused early:
+
+- UploadSizeLimitMiddleware caps the request body per route, from
+  Content-Length before any of the body is read, or as soon as a chunked
+  body goes over the cap: UPLOAD_MAX_BYTES for the single-file
+  /upload/image, UPLOAD_MAX_FILES * UPLOAD_MAX_BYTES for /upload/images
+  (plus room for the multipart framing)
+- check_upload_size() enforces UPLOAD_MAX_BYTES per file. It is a late
+  check: it runs on the parsed, already spooled file, so on /upload/images
+  one oversized file is only refused after the whole body has been read
+  (within that route's cap)
+"""
+import json
+import os
+from fastapi import HTTPException, UploadFile, status
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "10"))
+
+# Room for multipart boundaries and part headers on top of the file data
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(HTTPException):
+    """413; an HTTPException so it passes through body parsing to the route's handler"""
+
+    def __init__(self, detail: str = "Upload is too large"):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+def stream_size(file_object) -> int:
+    """Size of a seekable stream without reading it; the position is left unchanged"""
+    position = file_object.tell()
+    file_object.seek(0, os.SEEK_END)
+    size = file_object.tell()
+    file_object.seek(position)
+    return size
+
+
+def upload_size(file: UploadFile) -> int:
+    """Size of a parsed upload without reading it"""
+    if file.size is not None:
+        return file.size
+    return stream_size(file.file)
+
+
+def check_upload_size(file: UploadFile) -> None:
+    """Raise 413 if the file is over UPLOAD_MAX_BYTES"""
+    if upload_size(file) > UPLOAD_MAX_BYTES:
+        raise UploadTooLarge(
+            f"File {file.filename} is larger than {UPLOAD_MAX_BYTES / (1024 * 1024):g}MB"
+        )
+
+
+# Body cap for each upload route; other paths under the prefix get the single-file cap
+UPLOAD_BODY_LIMITS = {
+    "/upload/image": UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD,
+    "/upload/images": UPLOAD_MAX_FILES * UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD,
+}
+
+
+class UploadSizeLimitMiddleware:
+    """Refuse oversized upload request bodies before they are parsed"""
+
+    def __init__(self, app, path_prefix: str = "/upload", limits: dict = None,
+                 default_limit: int = UPLOAD_MAX_BYTES + _MULTIPART_OVERHEAD):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.limits = UPLOAD_BODY_LIMITS if limits is None else limits
+        self.default_limit = default_limit
+
+    def max_body(self, path: str) -> int:
+        return self.limits.get(path.rstrip("/"), self.default_limit)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Upload is too large"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            return await self.app(scope, receive, send)
+
+        max_body = self.max_body(scope["path"])
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_body:
+            return await self._reject(send)
+
+        received = 0
+
+        async def limited_receive():
+            # Chunked bodies have no Content-Length; stop parsing once over the limit
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    raise UploadTooLarge()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,93 @@
+"""
+Image uploads off the event loop.
+
+Storage calls (the Cloudinary SDK, disk writes) are blocking, so uploads run
+on a dedicated thread pool (separate from the request threadpool) and the
+routes await them. Each
+request has at most UPLOAD_CONCURRENCY uploads in flight; each attempt is
+bounded by UPLOAD_TIMEOUT_SECONDS and failed attempts are retried with a
+short exponential backoff.
+"""
+import asyncio
+import io
+import logging
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from utils.circuit_breaker import CircuitOpen
+from utils.storage import get_storage, is_provider_failure, new_key
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+UPLOAD_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_TIMEOUT_SECONDS", "30"))
+UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", "2"))
+UPLOAD_RETRY_BACKOFF = float(os.getenv("UPLOAD_RETRY_BACKOFF", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+
+class UploadTimeout(Exception):
+    """An upload did not finish within UPLOAD_TIMEOUT_SECONDS on any attempt"""
+
+
+def _is_retryable(error: Exception) -> bool:
+    # An open breaker will still be open after a short backoff
+    return is_provider_failure(error) and not isinstance(error, CircuitOpen)
+
+
+def upload_image(file_object, key: str, content_type: Optional[str] = None) -> str:
+    return get_storage().put(file_object, key, content_type)
+
+
+async def upload_image_async(file_object, content_type: Optional[str] = None) -> str:
+    """
+    Store on the upload pool with per-attempt timeout and retries; returns the URL.
+    Pass bytes rather than a stream where possible: each attempt then reads its
+    own BytesIO, so timed-out attempts can be retried too.
+    """
+    loop = asyncio.get_running_loop()
+    extension = mimetypes.guess_extension(content_type or "") or ""
+    key = new_key(extension)
+    is_bytes = isinstance(file_object, (bytes, bytearray))
+    for attempt in range(UPLOAD_RETRIES + 1):
+        body = io.BytesIO(file_object) if is_bytes else file_object
+        try:
+            # A timed-out attempt keeps its worker thread until the SDK call returns;
+            # the pool size bounds how many of those can pile up
+            return await asyncio.wait_for(
+                loop.run_in_executor(_upload_executor, upload_image, body, key, content_type),
+                timeout=UPLOAD_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            error = UploadTimeout(f"upload timed out after {UPLOAD_TIMEOUT_SECONDS:g}s")
+            # The timed-out attempt may still be reading a shared stream; don't hand it to a retry
+            if not is_bytes and hasattr(file_object, "read"):
+                break
+        except Exception as e:
+            if not _is_retryable(e):
+                raise
+            error = e
+        if attempt < UPLOAD_RETRIES:
+            logger.warning("Upload attempt %d failed (%s), retrying", attempt + 1, error)
+            if not is_bytes and hasattr(file_object, "seek"):
+                file_object.seek(0)
+            await asyncio.sleep(UPLOAD_RETRY_BACKOFF * (2 ** attempt))
+    raise error
+
+
+async def upload_images_concurrently(jobs, concurrency: int = UPLOAD_CONCURRENCY) -> list:
+    """
+    Run upload coroutines, at most `concurrency` at a time.
+    `jobs` are zero-argument callables returning a coroutine; results come back
+    in the same order, with the exception in place of a failed upload.
+    """
+    slots = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(job):
+        async with slots:
+            return await job()
+
+    return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
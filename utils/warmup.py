@@ -0,0 +1,123 @@
+"""
+Startup warm-up and readiness.
+
+Heavy one-time work (DB connection, JWT crypto backend, Cloudinary SDK) is
+deferred out of import time and done here in a background thread once the app
+has started. GET /ready reports 503 until every step has finished, so load
+balancers only route traffic to a warm worker.
+
+A step that fails (the database not accepting connections yet at boot, a
+storage timeout) is retried with exponential backoff, from
+WARMUP_RETRY_SECONDS up to WARMUP_RETRY_MAX_SECONDS, until it succeeds, so one
+transient error does not leave the worker unready for the life of the process.
+"""
+import logging
+import os
+import threading
+import time
+
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "30"))
+
+logger = logging.getLogger("warmup")
+
+
+class WarmUp:
+    """Named warm-up steps run in order, with per-step timing; failed steps are retried until they succeed"""
+
+    def __init__(self):
+        self._steps = []
+        self._status: dict = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._done = threading.Event()
+
+    def step(self, name: str):
+        """Decorator registering a warm-up step"""
+        def register(fn):
+            self._steps.append((name, fn))
+            self._status[name] = {"state": "pending"}
+            return fn
+        return register
+
+    def _run_step(self, name: str, fn, attempt: int) -> bool:
+        with self._lock:
+            self._status[name] = {**self._status[name], "state": "running", "attempts": attempt}
+        start = time.perf_counter()
+        try:
+            fn()
+            result = {"state": "done"}
+        except Exception as e:
+            logger.warning("Warm-up step '%s' failed (attempt %d): %s", name, attempt, e)
+            result = {"state": "failed", "error": str(e)}
+        result["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        result["attempts"] = attempt
+        with self._lock:
+            self._status[name] = result
+        return result["state"] == "done"
+
+    def _run(self) -> None:
+        attempts = {name: 0 for name, _ in self._steps}
+        pending = list(self._steps)
+        delay = WARMUP_RETRY_SECONDS
+        while True:
+            failed = []
+            for name, fn in pending:
+                attempts[name] += 1
+                if not self._run_step(name, fn, attempts[name]):
+                    failed.append((name, fn))
+            if not failed:
+                break
+            # Retry only the failed steps, backing off so a down dependency is not hammered
+            time.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+            pending = failed
+        logger.info("Warm-up finished: %s", {name: n for name, n in attempts.items()})
+        self._done.set()
+
+    def start(self) -> None:
+        """Run the steps in a background thread (idempotent)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return self._done.is_set() and all(
+                s["state"] == "done" for s in self._status.values()
+            )
+
+    def status(self) -> dict:
+        with self._lock:
+            steps = {name: dict(s) for name, s in self._status.items()}
+        return {"ready": self.is_ready(), "steps": steps}
+
+
+warmup = WarmUp()
+
+
+@warmup.step("database")
+def _warm_database():
+    from sqlalchemy import text
+    from db.session import get_engine
+    # Opens the first pooled connection
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+@warmup.step("jwt")
+def _warm_jwt():
+    from auth import create_access_token, _verify_token
+    # Loads python-jose and its crypto backend
+    _verify_token(create_access_token({"warmup": True}))
+
+
+@warmup.step("storage")
+def _warm_storage():
+    from utils.storage import STORAGE_BACKEND
+    # Imports and configures the Cloudinary SDK; the local backend needs no set-up
+    if STORAGE_BACKEND == "cloudinary":
+        from utils.cloudinary_utils import get_uploader
+        get_uploader()